@@ -0,0 +1,96 @@
+# app/api/errors.py
+
+from fastapi import FastAPI, Request, status as http_status
+from fastapi.responses import ORJSONResponse
+from loguru import logger
+from sqlalchemy.exc import IntegrityError, NoResultFound
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.exceptions import BadRequestError, FolderAlreadyExistsError
+
+
+def _error(status_code: int, detail: str) -> ORJSONResponse:
+    return ORJSONResponse(status_code=status_code, content={"detail": detail})
+
+
+async def _no_result_found(request: Request, exc: NoResultFound) -> ORJSONResponse:
+    return _error(http_status.HTTP_404_NOT_FOUND, str(exc))
+
+
+async def _integrity_error(request: Request, exc: IntegrityError) -> ORJSONResponse:
+    # the driver message contains SQL and parameters, keep it in the logs only
+    logger.info(f"{request.method} {request.url.path}: integrity error: {exc.orig}")
+    return _error(http_status.HTTP_409_CONFLICT, "Database constraint violated")
+
+
+async def _folder_already_exists(request: Request, exc: FolderAlreadyExistsError) -> ORJSONResponse:
+    return _error(http_status.HTTP_409_CONFLICT, str(exc))
+
+
+async def _file_exists(request: Request, exc: FileExistsError) -> ORJSONResponse:
+    # the OS message contains the physical path
+    logger.info(f"{request.method} {request.url.path}: {exc}")
+    return _error(http_status.HTTP_409_CONFLICT, "Target already exists")
+
+
+async def _bad_request(request: Request, exc: BadRequestError) -> ORJSONResponse:
+    return _error(http_status.HTTP_400_BAD_REQUEST, str(exc))
+
+
+class CatchAllMiddleware:
+    """
+    Turn unhandled exceptions into a generic 500 response.
+
+    Exception handlers for `Exception` are installed in the outermost
+    ServerErrorMiddleware, so their responses bypass CORS; this middleware is
+    added before CORSMiddleware and therefore runs inside it.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = False
+
+        async def _send(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        except Exception:
+            if started:
+                # too late to replace the response, let the server drop the connection
+                raise
+            logger.exception(f"Unhandled error on {scope['method']} {scope['path']}")
+            response = _error(http_status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal server error")
+            await response(scope, receive, send)
+
+
+def register_exception_handlers(app: FastAPI) -> None:
+    """
+    Map service-layer exceptions to HTTP responses once for the whole app,
+    so route handlers only contain the success path.
+    Must be called before CORSMiddleware is added, so 500s get CORS headers.
+
+    | Exception                  | Status |
+    |----------------------------|--------|
+    | `NoResultFound`            | 404    |
+    | `IntegrityError`           | 409    |
+    | `FolderAlreadyExistsError` | 409    |
+    | `FileExistsError`          | 409    |
+    | `BadRequestError`          | 400    |
+    | anything else              | 500    |
+    """
+    app.add_exception_handler(NoResultFound, _no_result_found)
+    app.add_exception_handler(IntegrityError, _integrity_error)
+    app.add_exception_handler(FolderAlreadyExistsError, _folder_already_exists)
+    app.add_exception_handler(FileExistsError, _file_exists)
+    app.add_exception_handler(BadRequestError, _bad_request)
+    app.add_middleware(CatchAllMiddleware)
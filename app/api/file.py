@@ -1,23 +1,45 @@
 # app/api/files.py
 
+import os
+import re
 import uuid
 from typing import List, Optional
+from urllib.parse import quote
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, Form
+from fastapi import APIRouter, Depends, status, UploadFile, Form, Header, Query, Request, Response
 from fastapi.responses import FileResponse
 from fastapi_pagination import Page
-from sqlalchemy.exc import IntegrityError, NoResultFound
 
 from app.schemas import PaginationParamsSchema
-from app.schemas.file import FileIn, FileOut, FileUpdate
+from app.schemas.file import FileIn, FileOut, FileUpdate, FileUploadInit, FileUploadStatus
+from app.core.config import settings
 from app.services import FileService
 from app.dependencies import get_file_service
+from app.utils.responses import LargeFileResponse, accel_redirect_response
+from app.utils.validators import VIRTUAL_FILE_PATH_PATTERN, VIRTUAL_FOLDER_PATH_PATTERN
+from app.utils.exceptions import BadRequestError
 
 router = APIRouter(
     prefix="/files",
     tags=["Files"]
 )
 
+_CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+def _parse_content_range(content_range: str) -> tuple[int, int]:
+    """
+    Parse `bytes start-end/total` into (offset, length).
+    """
+    match = _CONTENT_RANGE_RE.match(content_range.strip())
+    if match is None:
+        raise BadRequestError(f"Invalid Content-Range header: {content_range!r}")
+    start, end = int(match.group(1)), int(match.group(2))
+    if end < start:
+        raise BadRequestError(f"Invalid Content-Range header: {content_range!r}")
+    return start, end - start + 1
+
+
 @router.get(
     "/download/by-path",
     response_class=FileResponse,
@@ -29,23 +51,37 @@ router = APIRouter(
     summary="Download a file by its path",
 )
 async def download_file_by_path(
-    file_path: str,
+    file_path: str = Query(..., pattern=VIRTUAL_FILE_PATH_PATTERN),
     service: FileService = Depends(get_file_service),
 ):
     """
-    Download a file given its UUID.
+    Download a file given its path.
+
+    If `DOWNLOAD_ACCEL_HEADER` is configured, the reverse proxy streams the file instead.
     """
-    try:
-        file_out = await service.get_file_info_for_download(file_path)
-        return FileResponse(
-            path=file_out.storage_path,
-            filename=file_out.name,
-            media_type=file_out.mime_type or "application/octet-stream",
+    file_out = await service.get_file_info_for_download(file_path)
+    media_type = file_out.mime_type or "application/octet-stream"
+    if settings.DOWNLOAD_ACCEL_HEADER == "X-Accel-Redirect":
+        relative = os.path.relpath(file_out.storage_path, settings.STORAGE_BASE_PATH)
+        return accel_redirect_response(
+            settings.DOWNLOAD_ACCEL_HEADER,
+            settings.DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/" + quote(relative),
+            file_out.name,
+            media_type,
+        )
+    if settings.DOWNLOAD_ACCEL_HEADER:
+        return accel_redirect_response(
+            settings.DOWNLOAD_ACCEL_HEADER,
+            file_out.storage_path,
+            file_out.name,
+            media_type,
         )
-    except NoResultFound as e:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return LargeFileResponse(
+        path=file_out.storage_path,
+        filename=file_out.name,
+        media_type=media_type,
+        stat_result=file_out.stat_result,
+    )
 
 
 @router.get(
@@ -58,7 +94,7 @@ async def download_file_by_path(
     },
 )
 async def list_files(
-    folder_path: str,
+    folder_path: str = Query(..., pattern=VIRTUAL_FOLDER_PATH_PATTERN),
     params: PaginationParamsSchema = Depends(),
     service: FileService = Depends(get_file_service),
 ) -> Page[FileOut]:
@@ -66,12 +102,7 @@ async def list_files(
     List all files under the specified folder.
     If `folder_path` is omitted, lists all unassigned files.
     """
-    try:
-        return await service.list_files_by_folder_path(folder_path, params)
-    except NoResultFound as e:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return await service.list_files_by_folder_path(folder_path, params)
 
 
 @router.post(
@@ -89,7 +120,7 @@ async def list_files(
 async def upload_file(
     file: UploadFile,
     uploader_user_id: uuid.UUID = Form(..., description="Uploader's UUID"),
-    folder_path: str = Form(..., description="Virtual path for the file"),
+    folder_path: str = Form(..., pattern=VIRTUAL_FOLDER_PATH_PATTERN, description="Virtual path for the file"),
     service: FileService = Depends(get_file_service),
 ) -> FileOut:
     """
@@ -102,19 +133,93 @@ async def upload_file(
 
     - **Response** (`FileOut`): Details of the stored file.
     """
-    try:
-        return await service.upload(
-            file_name=file.filename,
-            uploader_user_id=uploader_user_id,
-            folder_path=folder_path,
-            stream=file.file,
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except IntegrityError as e:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    async def chunks():
+        while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    return await service.upload_stream(
+        file_name=file.filename,
+        uploader_user_id=uploader_user_id,
+        folder_path=folder_path,
+        chunks=chunks(),
+    )
+
+
+@router.post(
+    "/upload/init",
+    response_model=FileUploadStatus,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        201: {"description": "Upload initialized"},
+        400: {"description": "Bad request / extension not allowed"},
+        404: {"description": "Folder not found"},
+        500: {"description": "Internal server error"},
+    },
+    summary="Start a resumable upload",
+)
+async def init_upload(
+    upload_in: FileUploadInit,
+    service: FileService = Depends(get_file_service),
+) -> FileUploadStatus:
+    """
+    Start a resumable upload. Chunks are then sent with
+    `PATCH /files/upload/{upload_id}` and may arrive in any order or in parallel.
+    """
+    return await service.init_upload(upload_in)
+
+
+@router.patch(
+    "/upload/{upload_id}",
+    response_model=FileUploadStatus,
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"description": "Chunk stored; `file` is set once the upload is complete"},
+        400: {"description": "Invalid Content-Range or body length"},
+        404: {"description": "Upload not found"},
+        409: {"description": "Database conflict"},
+        500: {"description": "Internal server error"},
+    },
+    summary="Upload one chunk of a resumable upload",
+)
+async def upload_chunk(
+    upload_id: uuid.UUID,
+    request: Request,
+    content_range: str = Header(..., description="Byte range of the chunk, e.g. 'bytes 0-1048575/5242880'"),
+    service: FileService = Depends(get_file_service),
+) -> FileUploadStatus:
+    """
+    Store the request body at the byte range given by `Content-Range`.
+    """
+    offset, length = _parse_content_range(content_range)
+    return await service.append_chunk(upload_id, offset, length, request.stream())
+
+
+@router.head(
+    "/upload/{upload_id}",
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"description": "Progress returned in `Upload-Offset` / `Upload-Length` headers"},
+        404: {"description": "Upload not found"},
+        500: {"description": "Internal server error"},
+    },
+    summary="Get progress of a resumable upload",
+)
+async def get_upload_status(
+    upload_id: uuid.UUID,
+    service: FileService = Depends(get_file_service),
+) -> Response:
+    """
+    Report how many contiguous bytes have been received so a client can resume.
+    """
+    upload = await service.upload_status(upload_id)
+    return Response(
+        status_code=status.HTTP_200_OK,
+        headers={
+            "Upload-Offset": str(upload.offset),
+            "Upload-Length": str(upload.size_bytes),
+            "Cache-Control": "no-store",
+        },
+    )
 
 
 @router.patch(
@@ -123,6 +228,7 @@ async def upload_file(
     status_code=status.HTTP_200_OK,
     responses={
         200: {"description": "File metadata updated"},
+        400: {"description": "Extension not allowed"},
         404: {"description": "File not found"},
         409: {"description": "Conflict renaming or DB constraint"},
         500: {"description": "Internal server error"},
@@ -137,16 +243,7 @@ async def update_file(
     """
     Update metadata of an existing file (name, folder).
     """
-    try:
-        return await service.update_metadata(file_id, file_update)
-    except NoResultFound as e:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
-    except IntegrityError as e:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return await service.update_metadata(file_id, file_update)
 
 
 @router.delete(
@@ -160,15 +257,10 @@ async def update_file(
     summary="Delete a file by its Path",
 )
 async def delete_file(
-    file_path: str,
+    file_path: str = Query(..., pattern=VIRTUAL_FILE_PATH_PATTERN),
     service: FileService = Depends(get_file_service),
 ) -> None:
     """
     Delete a file given its Path.
     """
-    try:
-        await service.delete_file_by_path(file_path)
-    except NoResultFound as e:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    await service.delete_file_by_path(file_path)
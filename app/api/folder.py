@@ -3,15 +3,15 @@
 import uuid
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query, HTTPException, status as http_status
+from fastapi import APIRouter, Depends, Query, status as http_status
+from fastapi.responses import StreamingResponse
 from fastapi_pagination import Page
-from sqlalchemy.exc import IntegrityError, NoResultFound
 
 from app.schemas import PaginationParamsSchema
 from app.schemas.folder import FolderIn, FolderOut, FolderUpdate
 from app.services.folder_service import FolderService
 from app.dependencies import get_folder_service
-from app.utils.exceptions import FolderAlreadyExistsError
+from app.utils.validators import VIRTUAL_FOLDER_PATH_PATTERN
 
 router = APIRouter(
     prefix="/folders",
@@ -59,13 +59,44 @@ async def list_folders(
       - **200 OK**: Page of folders returned successfully.
       - **500 Internal Server Error**: Unexpected error occurred.
     """
-    try:
-        return await service.list_folders_by_parent_id(params, parent_id)
-    except Exception as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e),
-        )
+    return await service.list_folders_by_parent_id(params, parent_id)
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    status_code=http_status.HTTP_200_OK,
+    responses={
+        200: {
+            "description": "JSON array of `FolderOut`, streamed as rows are read",
+            "content": {"application/json": {}},
+        },
+    }
+)
+async def stream_folders(
+    parent_id: Optional[uuid.UUID] = Query(
+        None,
+        description="UUID of the parent folder (omit for root-level folders)"
+    ),
+    service: FolderService = Depends(get_folder_service),
+) -> StreamingResponse:
+    """
+    Retrieve all child folders under a given parent as one JSON array,
+    without pagination.
+
+    Rows are read through a server-side cursor and encoded one by one,
+    so memory use stays flat regardless of the number of folders.
+    Errors after the first byte has been sent can only abort the stream.
+    """
+    async def encode():
+        # serializes the model straight to JSON bytes (no intermediate dict), bound once
+        to_json = FolderOut.__pydantic_serializer__.to_json
+        separator = b"["
+        async for folder in service.stream_folders_by_parent_id(parent_id):
+            yield separator + to_json(folder)
+            separator = b","
+        yield b"]" if separator == b"," else b"[]"
+
+    return StreamingResponse(encode(), media_type="application/json")
 
 @router.get(
     "/by-path",
@@ -78,7 +109,11 @@ async def list_folders(
     }
 )
 async def get_folder_by_virtual_path(
-    path: str = Query(...,description="Unique virtual path of the folder, e.g. '/library/24/'"),
+    path: str = Query(
+        ...,
+        pattern=VIRTUAL_FOLDER_PATH_PATTERN,
+        description="Unique virtual path of the folder, e.g. '/library/24/'",
+    ),
     service: FolderService = Depends(get_folder_service),
 ) -> FolderOut:
     """
@@ -105,18 +140,7 @@ async def get_folder_by_virtual_path(
       - **422 Unprocessable Entity**: Validation error on input.
       - **500 Internal Server Error**: Unexpected error occurred.
     """
-    try:
-        return await service.get_by_virtual_path(path)
-    except NoResultFound as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_404_NOT_FOUND,
-            detail=str(e),
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e),
-        )
+    return await service.get_by_virtual_path(path)
 
 
 @router.get(
@@ -155,18 +179,7 @@ async def get_folder_by_id(
       - **404 Not Found**: No folder found with the given ID.
       - **500 Internal Server Error**: Unexpected error occurred.
     """
-    try:
-        return await service.get_by_id(folder_id)
-    except NoResultFound as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_404_NOT_FOUND,
-            detail=str(e),
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e),
-        )
+    return await service.get_by_id(folder_id)
 
 
 @router.post(
@@ -201,28 +214,7 @@ async def create_folder(
       - **409 Conflict**: A folder with the same virtual path already exists.
       - **500 Internal Server Error**: Unexpected error during creation.
     """
-    try:
-        return await service.create(folder_in)
-    except FileExistsError as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_409_CONFLICT,
-            detail=f"Folder already exists: {e}",
-        )
-    except IntegrityError as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_409_CONFLICT,
-            detail=f"Database constraint error: {e}",
-        )
-    except FolderAlreadyExistsError as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_409_CONFLICT,
-            detail=f"Folder already exists: {e}",
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e),
-        )
+    return await service.create(folder_in)
 
 
 @router.patch(
@@ -263,28 +255,7 @@ async def update_folder(
       - **409 Conflict**: Error renaming/moving folder on disk or DB constraint.
       - **500 Internal Server Error**: Unexpected error during update.
     """
-    try:
-        return await service.update(folder_id, folder_update)
-    except NoResultFound as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_404_NOT_FOUND,
-            detail=str(e),
-        )
-    except FileExistsError as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_409_CONFLICT,
-            detail=f"Filesystem operation failed: {e}",
-        )
-    except IntegrityError as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_409_CONFLICT,
-            detail=f"Database constraint error: {e}",
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e),
-        )
+    return await service.update(folder_id, folder_update)
 
 
 @router.delete(
@@ -311,15 +282,4 @@ async def delete_folder(
       - **404 Not Found**: No folder found with the given ID.
       - **500 Internal Server Error**: Unexpected error during deletion.
     """
-    try:
-        await service.delete(folder_id)
-    except NoResultFound as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_404_NOT_FOUND,
-            detail=str(e),
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e),
-        )
+    await service.delete(folder_id)
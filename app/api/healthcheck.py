@@ -1,23 +1,21 @@
-from fastapi import APIRouter, HTTPException, status as http_status
+from fastapi import APIRouter, Response
 
 router = APIRouter(tags=["Healthcheck"], prefix="/v1/healthcheck")
 
+# the body never changes, so it is encoded once; the Response itself is built
+# per request because middlewares (CORS) edit its raw header list in place
+_HEALTHY_BODY = b'{"healthy":true}'
+
 
 @router.get(
     "/",
+    response_class=Response,
     responses={
-        200: {"description": "Test successful"},
-        500:  {"description": "Test failed"},
+        200: {
+            "description": "Test successful",
+            "content": {"application/json": {"example": {"healthy": True}}},
+        },
     }
 )
-async def healthcheck():
-    try:
-        return {'healthy': True}
-    except Exception as e:
-        raise HTTPException(
-            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e),
-        )
-
-
-
+async def healthcheck() -> Response:
+    return Response(content=_HEALTHY_BODY, media_type="application/json")
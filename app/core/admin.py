@@ -1,8 +1,19 @@
 # app/admin.py
 from sqladmin import Admin, ModelView
-from app.db.session import sessionmanager
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
 from app.db.models import Folder, File, ResourceArchive
 
+# отдельный небольшой пул, чтобы тяжёлые запросы админки не занимали соединения API
+admin_engine = create_async_engine(
+    settings.POSTGRES_ASYNC_URL,
+    pool_size=settings.ADMIN_POOL_SIZE,
+    max_overflow=settings.ADMIN_MAX_OVERFLOW,
+    pool_timeout=settings.ADMIN_POOL_TIMEOUT,
+    pool_pre_ping=True,
+)
+
 class FolderAdmin(ModelView, model=Folder):
     column_list = [
         Folder.id, Folder.name, Folder.virtual_path, Folder.parent_id, Folder.created_at,
@@ -10,19 +21,25 @@ class FolderAdmin(ModelView, model=Folder):
     ]
     column_searchable_list = [Folder.name, Folder.virtual_path]
     # column_filters = [Folder.is_published]
+    page_size = 25
+    page_size_options = [25, 50, 100]
 
 class FileAdmin(ModelView, model=File):
     column_list = [
         File.id, File.name, File.mime_type, File.size_bytes, File.folder_id, File.created_at,
         File.storage_path, File.virtual_path, File.uploader_user_id, File.access_url,
     ]
+    page_size = 25
+    page_size_options = [25, 50, 100]
 
 class ResourceArchiveAdmin(ModelView, model=ResourceArchive):
     column_list = [ResourceArchive.id, ResourceArchive.folder_id, ResourceArchive.size, ResourceArchive.file_count, ResourceArchive.created_at]
+    page_size = 25
+    page_size_options = [25, 50, 100]
 
 def init_admin(app):
-    # engine — это AsyncEngine из sessionmanager._engine
-    admin = Admin(app, sessionmanager._engine, title="Virtual Storage Admin")
+    # sqladmin монтируется как отдельное ASGI-приложение на /admin
+    admin = Admin(app, admin_engine, title="Virtual Storage Admin")
     admin.add_view(FolderAdmin)
     admin.add_view(FileAdmin)
     admin.add_view(ResourceArchiveAdmin)
@@ -1,34 +1,74 @@
 # app/db/crud/file.py
 
-from typing import Optional, List
-from uuid import UUID
+from dataclasses import dataclass
+from typing import Optional, List, Sequence
+from uuid import UUID, uuid4
 
 from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import apaginate
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, insert, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from sqlalchemy.exc import NoResultFound, IntegrityError
 
 from app.db.models import File as FileORM
+from app.db.pagination import list_adapter, paginate_window
 from app.schemas import PaginationParamsSchema
 from app.schemas.file import FileIn, FileUpdate, FileDB, FileOut
 
 
+@dataclass(slots=True, frozen=True)
+class FileLocation:
+    """
+    Where a file lives on disk; built positionally from a column row, without Pydantic validation.
+    """
+    id: UUID
+    name: str
+    storage_path: str
+    mime_type: str
+
+
+_LOCATION_COLUMNS = (FileORM.id, FileORM.name, FileORM.storage_path, FileORM.mime_type)
+
+
 class FileRepository:
     """
     Repository for performing CRUD operations on File entities.
 
     All methods assume an AsyncSession is provided and manage only
-    database interactions (no file‐system operations).
+    database interactions (no file‐system operations). Nothing is
+    committed here: the calling service commits once per operation.
 
     :param session: an instance of AsyncSession bound to the engine
     """
+
+    __slots__ = ("session",)
+
     def __init__(self, session: AsyncSession):
         """
         Initialize the repository with an AsyncSession.
         """
         self.session = session
 
+    @staticmethod
+    def _row_values(
+        data: FileIn,
+        storage_path: str,
+        virtual_path: str,
+        size_bytes: int,
+        mime_type: str,
+        checksum_sha256: Optional[str],
+    ) -> dict:
+        return dict(
+            name=data.name,
+            virtual_path=virtual_path,
+            uploader_user_id=data.uploader_user_id,
+            folder_id=data.folder_id,
+            storage_path=storage_path,
+            size_bytes=size_bytes,
+            mime_type=mime_type,
+            checksum_sha256=checksum_sha256,
+        )
+
     async def create(
         self,
         data: FileIn,
@@ -37,30 +77,54 @@ class FileRepository:
         size_bytes: int = 0,
         mime_type: str = "",
         file_id: Optional[UUID] = None,
+        checksum_sha256: Optional[str] = None,
     ) -> FileDB:
         """
         Create a new File record in the database.
 
         :param data: DTO containing input fields for the new file
         :param storage_path: the physical path on disk where the file is stored
+        :param checksum_sha256: hex SHA-256 of the stored content
         :returns: a FileDB schema with all fields populated (including id, timestamps)
         :raises: IntegrityError if constraints are violated
         """
-        file = FileORM(
-            id=file_id,
-            name=data.name,
-            virtual_path=virtual_path,
-            uploader_user_id=data.uploader_user_id,
-            folder_id=data.folder_id,
-            storage_path=storage_path,
-            size_bytes=size_bytes,
-            mime_type=mime_type,
+        values = self._row_values(data, storage_path, virtual_path, size_bytes, mime_type, checksum_sha256)
+        if file_id is not None:
+            values["id"] = file_id
+        # server defaults (timestamps) come back inline, no refresh SELECT needed
+        result = await self.session.execute(
+            insert(FileORM).values(**values).returning(FileORM)
         )
-        self.session.add(file)
-        await self.session.flush()
-        await self.session.commit()
-        await self.session.refresh(file)
-        return FileDB.model_validate(file)
+        return FileDB.model_validate(result.scalar_one())
+
+    async def bulk_create(
+        self,
+        items: Sequence[tuple[FileIn, str, str, int, str, Optional[UUID], Optional[str]]],
+    ) -> List[FileDB]:
+        """
+        Create several File records with a single multi-row INSERT ... RETURNING.
+
+        :param items: tuples of (data, storage_path, virtual_path, size_bytes,
+                      mime_type, file_id, checksum_sha256), as for create()
+        :returns: FileDB schemas in the order the rows were given
+        :raises: IntegrityError if constraints are violated
+        """
+        if not items:
+            return []
+        values_list = []
+        for data, storage_path, virtual_path, size_bytes, mime_type, file_id, checksum_sha256 in items:
+            values = self._row_values(data, storage_path, virtual_path, size_bytes, mime_type, checksum_sha256)
+            # rows with identical keys are batched into the same multi-VALUES statement
+            values["id"] = file_id if file_id is not None else uuid4()
+            values_list.append(values)
+
+        # ORM bulk insert: "insertmanyvalues" renders one INSERT ... VALUES (...), (...) RETURNING
+        # per batch and sorts the returned rows back into parameter order
+        result = await self.session.execute(
+            insert(FileORM).returning(FileORM, sort_by_parameter_order=True),
+            values_list,
+        )
+        return list_adapter(FileDB).validate_python(result.scalars().all(), from_attributes=True)
 
     async def get_by_id(self, file_id: UUID) -> FileDB:
         """
@@ -70,29 +134,27 @@ class FileRepository:
         :returns: FileDB if found
         :raises: NoResultFound if no matching record exists
         """
-        q = await self.session.execute(
-            select(FileORM).where(FileORM.id == file_id)
-        )
-        file = q.scalar_one_or_none()
+        # checks the session identity map before issuing a SELECT
+        file = await self.session.get(FileORM, file_id)
         if file is None:
             raise NoResultFound(f"File with id {file_id} not found")
         return FileDB.model_validate(file)
 
-    async def get_by_path(self, file_path: str) -> FileDB:
+    async def get_location_by_path(self, file_path: str) -> FileLocation:
         """
-        Retrieve a single File by its Path.
+        Retrieve only the on-disk location of a File by its virtual path.
 
         :param file_path: the virtual path of the file to fetch
-        :returns: FileDB if found
+        :returns: FileLocation if found
         :raises: NoResultFound if no matching record exists
         """
         q = await self.session.execute(
-            select(FileORM).where(FileORM.virtual_path == file_path)
+            select(*_LOCATION_COLUMNS).where(FileORM.virtual_path == file_path)
         )
-        file = q.scalar_one_or_none()
-        if file is None:
+        row = q.one_or_none()
+        if row is None:
             raise NoResultFound(f"File with path {file_path} not found")
-        return FileDB.model_validate(file)
+        return FileLocation(*row)
 
     async def list_by_folder_path(
             self,
@@ -109,15 +171,18 @@ class FileRepository:
             select(FileORM)
             .where(FileORM.folder_id == folder_id)
             .order_by(FileORM.name)
+            # page items only expose columns; never lazy-load relationships per row
+            .options(raiseload("*"))
         )
-        page: Page[FileOut] = await apaginate(self.session, query, params)
-        return page
+        # total comes back with the page itself via COUNT(*) OVER ()
+        return await paginate_window(self.session, query, params, FileOut)
 
     async def update(
         self,
         file_id: UUID,
         data: FileUpdate,
         storage_path: Optional[str] = None,
+        virtual_path: Optional[str] = None,
         size_bytes: Optional[int] = None,
         mime_type: Optional[str] = None,
     ) -> FileDB:
@@ -125,11 +190,12 @@ class FileRepository:
         Partially update fields of an existing File.
 
         Any fields not present in `data` will remain unchanged.
-        Optionally override storage_path, size_bytes, or mime_type if provided.
+        Optionally override storage_path, virtual_path, size_bytes, or mime_type if provided.
 
         :param file_id: the UUID of the file to update
         :param data: DTO containing fields to update
         :param storage_path: new physical path on disk, if moved/renamed
+        :param virtual_path: new virtual path, if moved/renamed
         :param size_bytes: new size in bytes, if re-calculated
         :param mime_type: new MIME type, if re-detected
         :returns: updated FileDB
@@ -138,6 +204,8 @@ class FileRepository:
         values = data.model_dump(exclude_unset=True)
         if storage_path is not None:
             values["storage_path"] = storage_path
+        if virtual_path is not None:
+            values["virtual_path"] = virtual_path
         if size_bytes is not None:
             values["size_bytes"] = size_bytes
         if mime_type is not None:
@@ -147,22 +215,45 @@ class FileRepository:
             update(FileORM)
             .where(FileORM.id == file_id)
             .values(**values)
+            .returning(FileORM)
         )
-        if result.rowcount == 0:
+        file = result.scalar_one_or_none()
+        if file is None:
             raise NoResultFound(f"File with id {file_id} not found")
-        await self.session.commit()
-        return await self.get_by_id(file_id)
+        return FileDB.model_validate(file)
 
-    async def delete(self, file_id: UUID) -> None:
+    async def delete(self, file_id: UUID) -> FileLocation:
         """
-        Delete a File record by its ID, then commit.
+        Delete a File record by its ID.
 
         :param file_id: the UUID of the file to delete
+        :returns: FileLocation of the deleted row
         :raises: NoResultFound if no row was deleted
         """
         result = await self.session.execute(
-            delete(FileORM).where(FileORM.id == file_id)
+            delete(FileORM)
+            .where(FileORM.id == file_id)
+            .returning(*_LOCATION_COLUMNS)
         )
-        if result.rowcount == 0:
+        row = result.one_or_none()
+        if row is None:
             raise NoResultFound(f"File with id {file_id} not found")
-        await self.session.commit()
+        return FileLocation(*row)
+
+    async def delete_by_path(self, file_path: str) -> FileLocation:
+        """
+        Delete a File record by its virtual path.
+
+        :param file_path: the virtual path of the file to delete
+        :returns: FileLocation of the deleted row
+        :raises: NoResultFound if no row was deleted
+        """
+        result = await self.session.execute(
+            delete(FileORM)
+            .where(FileORM.virtual_path == file_path)
+            .returning(*_LOCATION_COLUMNS)
+        )
+        row = result.one_or_none()
+        if row is None:
+            raise NoResultFound(f"File with path {file_path} not found")
+        return FileLocation(*row)
@@ -1,15 +1,17 @@
 # app/db/crud/folder.py
 
-from typing import Optional, List
+from typing import Optional, List, AsyncIterator
 from uuid import UUID
 
 from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from sqlalchemy.exc import NoResultFound
-from fastapi_pagination.ext.sqlalchemy import apaginate
 from fastapi_pagination import Page
 
 from app.db.models import Folder as FolderORM
+from app.db.pagination import paginate_window
 from app.schemas import FolderIn, FolderUpdate, FolderDB, PaginationParamsSchema, FolderOut
 
 
@@ -18,75 +20,93 @@ class FolderRepository:
     Repository for performing CRUD operations on Folder entities.
 
     All methods assume an AsyncSession is provided and manage only
-    database interactions (no file‐system operations).
+    database interactions (no file‐system operations). Nothing is
+    committed here: the calling service commits once per operation.
 
     :param session: an instance of AsyncSession bound to the engine
     """
 
+    __slots__ = ("session", "_path_cache")
+
     def __init__(self, session: AsyncSession):
         """
         Initialize the repository with an AsyncSession.
         """
         self.session = session
+        # repositories live for one request, so this never outlives the session
+        self._path_cache: dict[str, FolderDB] = {}
 
     async def create(
         self,
         data: FolderIn,
         storage_path: str,
         virtual_path: str
-    ) -> FolderDB:
+    ) -> Optional[FolderDB]:
         """
-        Create a new Folder record in the database.
+        Insert a new Folder record unless one with the same path already exists.
+
+        Runs as a single `INSERT ... ON CONFLICT DO NOTHING RETURNING` statement.
 
         :param data: DTO containing input fields for the new folder
         :param storage_path: the physical path on disk where the folder will live
         :param virtual_path: the virtual URL/path under which the folder is exposed
-        :returns: a FolderDB schema with all fields populated (including id, timestamps)
-        :raises: IntegrityError if constraints are violated
-        """
-        folder = FolderORM(
-            name=data.name,
-            parent_id=data.parent_id,
-            creator_user_id=data.creator_user_id,
-            is_published=data.is_published,
-            storage_path=storage_path,
-            virtual_path=virtual_path
+        :returns: a FolderDB schema with all fields populated (including id, timestamps),
+                  or None if a folder with this path already exists
+        """
+        result = await self.session.execute(
+            insert(FolderORM)
+            .values(
+                name=data.name,
+                parent_id=data.parent_id,
+                creator_user_id=data.creator_user_id,
+                is_published=data.is_published,
+                storage_path=storage_path,
+                virtual_path=virtual_path
+            )
+            .on_conflict_do_nothing()
+            .returning(FolderORM)
         )
-        self.session.add(folder)
-        await self.session.flush()
-        await self.session.commit()
-        await self.session.refresh(folder)
+        folder = result.scalar_one_or_none()
+        if folder is None:
+            return None
         return FolderDB.model_validate(folder)
 
-    async def get_by_id(self, folder_id: UUID) -> FolderDB:
+    async def get_by_id(self, folder_id: UUID, for_share: bool = False) -> FolderDB:
         """
         Retrieve a single Folder by its ID.
 
         :param folder_id: the UUID of the folder to fetch
+        :param for_share: lock the row (FOR SHARE) until the transaction ends, so it
+                          can't be renamed or deleted while something is placed into it
         :returns: FolderDB if found, or None if no matching record exists
         """
-        q = await self.session.execute(
-            select(FolderORM).where(FolderORM.id == folder_id)
+        # checks the session identity map before issuing a SELECT
+        folder = await self.session.get(
+            FolderORM, folder_id, with_for_update={"read": True} if for_share else None
         )
-        folder = q.scalar_one_or_none()
         if folder is None:
             raise NoResultFound(f"Folder with id {folder_id} not found")
         return FolderDB.model_validate(folder)
 
     async def get_by_virtual_path(self, virtual_path: str) -> FolderDB:
         """
-        Retrieve a single Folder by its ID.
+        Retrieve a single Folder by its virtual path.
 
-        :param folder_id: the UUID of the folder to fetch
-        :returns: FolderDB if found, or None if no matching record exists
+        :param virtual_path: the virtual path of the folder to fetch
+        :returns: FolderDB if found
+        :raises NoResultFound: if no matching record exists
         """
+        cached = self._path_cache.get(virtual_path)
+        if cached is not None:
+            return cached
         q = await self.session.execute(
             select(FolderORM).where(FolderORM.virtual_path == virtual_path)
         )
         folder = q.scalar_one_or_none()
         if folder is None:
             raise NoResultFound(f"Folder with path {virtual_path} not found")
-        return FolderDB.model_validate(folder)
+        self._path_cache[virtual_path] = item = FolderDB.model_validate(folder)
+        return item
 
     async def list_by_parent_paginated(
             self,
@@ -104,10 +124,34 @@ class FolderRepository:
             select(FolderORM)
             .where(FolderORM.parent_id == parent_id)
             .order_by(FolderORM.name)
+            # page items only expose columns; never lazy-load relationships per row
+            .options(raiseload("*"))
+        )
+        # total comes back with the page itself via COUNT(*) OVER ()
+        return await paginate_window(self.session, query, params, FolderOut)
+
+    async def stream_by_parent(
+            self,
+            parent_id: Optional[UUID],
+            batch_size: int = 500,
+    ) -> AsyncIterator[FolderORM]:
+        """
+        Stream all child folders under a given parent through a server-side cursor.
+
+        :param parent_id: parent folder UUID, or None for root
+        :param batch_size: rows fetched from the cursor per round-trip
+        :returns: async iterator of Folder ORM rows ordered by name
+        """
+        query = (
+            select(FolderORM)
+            .where(FolderORM.parent_id == parent_id)
+            .order_by(FolderORM.name)
+            .options(raiseload("*"))
+            .execution_options(yield_per=batch_size)
         )
-        # use the async SQLAlchemy paginator
-        page: Page[FolderOut] = await apaginate(self.session, query, params)
-        return page
+        result = await self.session.stream_scalars(query)
+        async for folder in result:
+            yield folder
 
     async def update(
         self,
@@ -126,7 +170,8 @@ class FolderRepository:
         :param data: DTO containing fields to update
         :param storage_path: new physical path on disk, if renamed/moved
         :param virtual_path: new virtual path, if renamed/moved
-        :returns: updated FolderDB, or None if no such folder existed
+        :returns: updated FolderDB
+        :raises NoResultFound: if no such folder existed
         """
         values = data.model_dump(exclude_unset=True)
         if storage_path is not None:
@@ -134,26 +179,35 @@ class FolderRepository:
         if virtual_path is not None:
             values["virtual_path"] = virtual_path
 
-        await self.session.execute(
+        self._path_cache.clear()
+        result = await self.session.execute(
             update(FolderORM)
             .where(FolderORM.id == folder_id)
             .values(**values)
+            .returning(FolderORM)
         )
-        await self.session.commit()
-        return await self.get_by_id(folder_id)
+        folder = result.scalar_one_or_none()
+        if folder is None:
+            raise NoResultFound(f"Folder with id {folder_id} not found")
+        return FolderDB.model_validate(folder)
 
-    async def delete(self, folder_id: UUID) -> None:
+    async def delete(self, folder_id: UUID) -> FolderDB:
         """
-        Delete a Folder record by its ID, then commit.
+        Delete a Folder record by its ID in a single `DELETE ... RETURNING` statement.
+
+        Descendant folders and files are removed by ON DELETE CASCADE.
 
         :param folder_id: the UUID of the folder to delete
+        :returns: the deleted folder
         :raises NoResultFound: if no row was deleted
         """
+        self._path_cache.clear()
         result = await self.session.execute(
-            delete(FolderORM).where(FolderORM.id == folder_id)
+            delete(FolderORM)
+            .where(FolderORM.id == folder_id)
+            .returning(FolderORM)
         )
-        # Check how many rows were affected
-        if result.rowcount == 0:
+        folder = result.scalar_one_or_none()
+        if folder is None:
             raise NoResultFound(f"Folder with id {folder_id} not found")
-        # persist the deletion
-        await self.session.commit()
+        return FolderDB.model_validate(folder)
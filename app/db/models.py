@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import Optional, List
 
-from sqlalchemy import DateTime, func, ForeignKey, String, BigInteger, Integer
+from sqlalchemy import DateTime, func, ForeignKey, String, BigInteger, Integer, Index
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, ARRAY
 
@@ -12,6 +12,10 @@ class Base(DeclarativeBase):
 
 class Folder(Base):
     __tablename__ = 'fjc_folder'
+    # листинг дочерних папок: WHERE parent_id = ? ORDER BY name LIMIT/OFFSET без сортировки
+    __table_args__ = (
+        Index("ix_fjc_folder_parent_name", "parent_id", "name"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String, nullable=False, doc="Название папки")
@@ -34,6 +38,10 @@ class Folder(Base):
 
 class File(Base):
     __tablename__ = 'fjc_file'
+    # листинг файлов папки: WHERE folder_id = ? ORDER BY name LIMIT/OFFSET без сортировки
+    __table_args__ = (
+        Index("ix_fjc_file_folder_name", "folder_id", "name"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String, nullable=False, doc="Название файла")
@@ -42,6 +50,7 @@ class File(Base):
     uploader_user_id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
     size_bytes: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False, doc="Размер файла в байтах")
     mime_type: Mapped[str] = mapped_column(String, nullable=False, doc="Тип файла 'image/jpeg', 'application/pdf', 'video/mp4'")
+    checksum_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, doc="SHA-256 содержимого файла (hex)")
     folder_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("fjc_folder.id", ondelete="CASCADE"), nullable=True, doc="ID родительской папки")
     access_url: Mapped[Optional[str]] = mapped_column(String, nullable=True, doc="URL для доступа к файлу")
 
@@ -0,0 +1,58 @@
+# app/db/pagination.py
+
+from functools import lru_cache
+from typing import TypeVar
+
+from fastapi_pagination import Page, Params
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+@lru_cache
+def list_adapter(model: type[ModelT]) -> TypeAdapter[list[ModelT]]:
+    """
+    One compiled `list[model]` validator per model, reused for every page.
+    """
+    return TypeAdapter(list[model])
+
+
+async def paginate_window(
+    session: AsyncSession,
+    query: Select,
+    params: Params,
+    model: type[ModelT],
+) -> Page[ModelT]:
+    """
+    Paginate a single-entity select in one round-trip.
+
+    The total is fetched alongside the page via `COUNT(*) OVER ()` instead of
+    a separate `SELECT COUNT(*)`. Only a page past the end (no rows, so no
+    total) falls back to a plain count.
+
+    :param session: the AsyncSession to execute on
+    :param query: a `select(Entity)` statement, already filtered and ordered
+    :param params: pagination parameters (page, size)
+    :param model: Pydantic model the ORM rows are validated into
+    :returns: Page of `model` items
+    """
+    raw = params.to_raw_params()
+    result = await session.execute(
+        query
+        .add_columns(func.count().over().label("total"))
+        .limit(raw.limit)
+        .offset(raw.offset)
+    )
+    # single pass over the cursor: collect entities directly, no intermediate Row list
+    entities = []
+    total = None
+    for entity, total in result:
+        entities.append(entity)
+    if total is None:
+        total = await session.scalar(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+    items = list_adapter(model).validate_python(entities, from_attributes=True)
+    return Page.create(items=items, params=params, total=total)
@@ -1,8 +1,9 @@
 # app/db/session.py
+import asyncio
 import contextlib
 import sys
 from loguru import logger
-from typing import Any, AsyncIterator, Dict, AsyncGenerator
+from typing import Any, AsyncIterator, AsyncGenerator, Optional
 
 from app.core.config import settings
 from sqlalchemy import text
@@ -15,15 +16,52 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.exc import OperationalError
 from app.db.models import Base
 
+# repositories issue the same few statements over and over: keep their compiled
+# SQL and asyncpg prepared statements cached, and skip PG JIT for point queries
+DEFAULT_ENGINE_KWARGS: dict[str, Any] = {
+    "query_cache_size": 1200,
+}
+DEFAULT_CONNECT_ARGS: dict[str, Any] = {
+    "prepared_statement_cache_size": 500,
+    "statement_cache_size": 1024,
+    "server_settings": {"jit": "off"},
+}
+
+
 class DatabaseSessionManager:
-    def __init__(self, host: str, engine_kwargs: dict[str, Any] = Dict):
+    def __init__(self, host: str, engine_kwargs: Optional[dict[str, Any]] = None):
+        engine_kwargs = {**DEFAULT_ENGINE_KWARGS, **(engine_kwargs or {})}
+        engine_kwargs["connect_args"] = {**DEFAULT_CONNECT_ARGS, **engine_kwargs.get("connect_args", {})}
         self._engine = create_async_engine(host, **engine_kwargs)
-        self._sessionmaker = async_sessionmaker(autocommit=False, bind=self._engine)
+        # sessions are request-scoped and rows are read back through RETURNING,
+        # so there is nothing to reload after commit or to flush before a select
+        self._sessionmaker = async_sessionmaker(
+            bind=self._engine,
+            expire_on_commit=False,
+            autoflush=False,
+        )
 
     async def test_connection(self) -> None:
         async with self._engine.connect() as conn:
             await conn.execute(text("SELECT 1"))
 
+    async def warm_up(self, connections: int) -> None:
+        """
+        Open `connections` pooled connections at once and return them to the pool,
+        so the first requests after startup don't pay the connect + auth latency.
+        """
+        # return_exceptions: let every connect finish, so none is left open when one fails
+        results = await asyncio.gather(
+            *(self._engine.connect().start() for _ in range(connections)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if not isinstance(result, BaseException):
+                await result.close()
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
     async def close(self) -> None:
         await self._engine.dispose()
         self._engine = None
@@ -52,7 +90,14 @@ class DatabaseSessionManager:
 
 sessionmanager = DatabaseSessionManager(
     settings.POSTGRES_ASYNC_URL,
-    {"echo": False}
+    {
+        "echo": False,
+        "pool_size": settings.POOL_SIZE,
+        "max_overflow": settings.MAX_OVERFLOW,
+        "pool_timeout": settings.POOL_TIMEOUT,
+        "pool_recycle": settings.POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
 )
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
@@ -1,8 +1,12 @@
 # app/api/dependencies.py
 
+from concurrent.futures import Executor
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 
 from fastapi import Depends
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
@@ -10,9 +14,64 @@ from app.db.crud import FileRepository
 from app.db.session import get_db_session
 from app.db.crud.folder import FolderRepository
 from app.services import FileService, FileDiskService
+from app.services.folder_cache import FolderCache
 from app.services.folder_disc_service import FolderDiskService
 from app.services.folder_service import FolderService
 
+_cpu_pool: Optional[Executor] = None
+
+
+@lru_cache
+def get_folder_disk_service() -> FolderDiskService:
+    """
+    Process-wide FolderDiskService; it holds no per-request state.
+    """
+    return FolderDiskService(
+        base_path=Path(settings.STORAGE_BASE_PATH),
+        system_path=Path(settings.storage_system_path),
+    )
+
+
+@lru_cache
+def get_file_disk_service() -> FileDiskService:
+    """
+    Process-wide FileDiskService; it holds no per-request state.
+    """
+    return FileDiskService(
+        base_path=Path(settings.STORAGE_BASE_PATH),
+        system_path=Path(settings.storage_system_path),
+        allowed_extensions=getattr(settings, "ALLOWED_FILE_EXTENSIONS", None),
+        max_size_bytes=settings.MAX_UPLOAD_SIZE_BYTES,
+        write_buffer_size=settings.UPLOAD_WRITE_BUFFER_SIZE,
+        hash_executor=_cpu_pool,
+    )
+
+
+@lru_cache
+def get_folder_cache() -> FolderCache:
+    """
+    Process-wide folder cache, backed by Redis when REDIS_URL is set.
+    """
+    redis = Redis.from_url(settings.REDIS_URL) if settings.REDIS_URL else None
+    return FolderCache(
+        redis=redis,
+        ttl=settings.FOLDER_CACHE_TTL,
+        local_ttl=settings.FOLDER_CACHE_LOCAL_TTL,
+    )
+
+
+def init_services(cpu_pool: Optional[Executor] = None) -> None:
+    """
+    Build the session-independent service parts once, at app startup.
+
+    :param cpu_pool: executor for CPU-heavy work such as checksums
+    """
+    global _cpu_pool
+    _cpu_pool = cpu_pool
+    get_folder_disk_service()
+    get_file_disk_service()
+    get_folder_cache()
+
 
 def get_folder_service(
     session: AsyncSession = Depends(get_db_session),
@@ -21,13 +80,12 @@ def get_folder_service(
     FastAPI dependency that provides a FolderService instance,
     сконфигурированный с сессией, репозиторием и дисковым сервисом.
     """
-    repo = FolderRepository(session)
-    disk = FolderDiskService(base_path=Path(settings.STORAGE_BASE_PATH))
     return FolderService(
         session=session,
-        repo=repo,
-        disk=disk,
-        base_virtual=settings.VIRTUAL_BASE_PATH
+        repo=FolderRepository(session),
+        disk=get_folder_disk_service(),
+        base_virtual=settings.VIRTUAL_BASE_PATH,
+        cache=get_folder_cache(),
     )
 
 def get_file_service(
@@ -37,15 +95,9 @@ def get_file_service(
     FastAPI dependency that provides a FileService instance,
     configured with the AsyncSession, FileRepository, and FileDiskService.
     """
-    repo = FileRepository(session)
-    folder_repo = FolderRepository(session)
-    disk = FileDiskService(
-        base_path=Path(settings.STORAGE_BASE_PATH),
-        allowed_extensions=getattr(settings, "ALLOWED_FILE_EXTENSIONS", None),
-    )
     return FileService(
         session=session,
-        repo=repo,
-        folder_repo=folder_repo,
-        disk=disk,
+        repo=FileRepository(session),
+        folder_repo=FolderRepository(session),
+        disk=get_file_disk_service(),
     )
@@ -1,33 +1,65 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
 from loguru import logger
 from contextlib import asynccontextmanager
 import uvicorn
 from typing import AsyncGenerator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi_pagination import add_pagination
-from app.core.admin import init_admin
+from app.core.admin import init_admin, admin_engine
 
 from app import api
+from app.api.errors import register_exception_handlers
 from app.core.config import settings
 from app.db.session import sessionmanager
+from app.dependencies import init_services, get_folder_disk_service, get_file_disk_service
+
+
+async def purge_stale_uploads() -> None:
+    """
+    Periodically delete abandoned resumable/staged uploads.
+    """
+    disk = get_file_disk_service()
+    while True:
+        try:
+            removed = await disk.purge_stale_uploads(settings.UPLOAD_EXPIRE_SECONDS)
+            if removed:
+                logger.info(f"Purged {removed} stale uploads")
+        except OSError as e:
+            logger.warning(f"Stale upload purge failed: {e}")
+        await asyncio.sleep(settings.UPLOAD_PURGE_INTERVAL)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    app.state.cpu_pool = ProcessPoolExecutor(max_workers=settings.CPU_POOL_WORKERS or os.cpu_count())
+    init_services(app.state.cpu_pool)
+    await get_folder_disk_service().purge_trash()
     try:
         await sessionmanager.test_connection()
+        await sessionmanager.warm_up(settings.POOL_SIZE)
         logger.info("DB connection created successfully")
     except Exception:
         logger.error(f"DB connection failed: {settings.POSTGRES_ASYNC_URL}")
+    upload_purger = asyncio.create_task(purge_stale_uploads())
     yield
+    upload_purger.cancel()
+    app.state.cpu_pool.shutdown()
+    await admin_engine.dispose()
 
 app = FastAPI(
     lifespan=lifespan,
     docs_url="/api/docs",
+    default_response_class=ORJSONResponse,
 )
 
 init_admin(app)
 
+register_exception_handlers(app)
+
 add_pagination(app)
 
 app.add_middleware(
@@ -43,4 +75,10 @@ app.include_router(api.folder_router)
 app.include_router(api.file_router)
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=settings.DEBUG,
+        backlog=settings.UVICORN_BACKLOG,
+    )
@@ -1,17 +1,23 @@
 # app/schemas/file.py
 
+import os
 from typing import Optional
 from uuid import UUID
 from datetime import datetime
 
 from pydantic import BaseModel, Field, ConfigDict
 
-from app.utils.validators import NoSlashString
+from app.utils.validators import NoSlashString, VIRTUAL_FOLDER_PATH_PATTERN
 
 class FileDownloadInfo(BaseModel):
     name: str
     storage_path: str
     mime_type: str
+    stat_result: Optional[os.stat_result] = None
+
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True
+    )
 
 
 class FileIn(BaseModel):
@@ -30,12 +36,33 @@ class FileOut(FileIn):
     id: UUID = Field(..., description="UUID of the file")
     size_bytes: int = Field(..., description="Size of the file in bytes")
     mime_type: str = Field(..., description="MIME type, e.g. 'image/jpeg'")
+    checksum_sha256: Optional[str] = Field(None, description="Hex SHA-256 of the file content")
     virtual_path: str = Field(..., description="New virtual path (optional)")
     access_url: Optional[str] = Field(None, description="Public URL to download or view the file")
     created_at: datetime = Field(..., description="Timestamp when created")
     updated_at: datetime = Field(..., description="Timestamp when last updated")
 
 
+class FileUploadInit(BaseModel):
+    """
+    DTO for starting a resumable (chunked) upload.
+    """
+    name: NoSlashString = Field(..., description="Original filename (3–100 chars, no '/')")
+    uploader_user_id: UUID = Field(..., description="UUID of the user uploading the file")
+    folder_path: str = Field(..., pattern=VIRTUAL_FOLDER_PATH_PATTERN, description="Virtual path of the destination folder")
+    size_bytes: int = Field(..., ge=0, description="Total size of the file in bytes")
+
+
+class FileUploadStatus(BaseModel):
+    """
+    DTO describing the progress of a resumable upload.
+    """
+    upload_id: UUID = Field(..., description="UUID of the upload (becomes the file UUID)")
+    offset: int = Field(..., description="Number of contiguous bytes received from the start")
+    size_bytes: int = Field(..., description="Total size of the file in bytes")
+    file: Optional[FileOut] = Field(None, description="Stored file, once the upload is complete")
+
+
 class FileUpdate(BaseModel):
     """
     DTO for updating File metadata.
@@ -56,6 +83,7 @@ class FileDB(BaseModel):
     folder_id: Optional[UUID] = Field(None, description="Parent folder UUID")
     size_bytes: int = Field(..., description="Size in bytes")
     mime_type: str = Field(..., description="MIME type")
+    checksum_sha256: Optional[str] = Field(None, description="Hex SHA-256 of the content")
     access_url: Optional[str] = Field(None, description="Public access URL")
     created_at: datetime = Field(..., description="Creation timestamp")
     updated_at: datetime = Field(..., description="Last updated timestamp")
@@ -1,3 +1,4 @@
+from .folder_cache import FolderCache
 from .folder_disc_service import FolderDiskService
 from .folder_service import FolderService
 from .file_disc_service import FileDiskService
@@ -0,0 +1,45 @@
+from typing import Callable, Optional, TypeVar
+
+import anyio
+import anyio.to_thread
+from anyio import CapacityLimiter
+
+T = TypeVar("T")
+
+# disk work gets its own thread budget so slow storage cannot starve
+# the default pool that Starlette uses for sync endpoints and file reads
+DISK_IO_THREADS = 64
+# recursive deletes hold a thread for the whole walk; cap them separately so a
+# burst of folder deletes cannot take every disk I/O token from uploads/downloads
+TREE_DELETE_THREADS = 8
+
+_limiter: Optional[CapacityLimiter] = None
+_tree_delete_limiter: Optional[CapacityLimiter] = None
+
+
+def _get_limiter() -> CapacityLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = CapacityLimiter(DISK_IO_THREADS)
+    return _limiter
+
+
+def _get_tree_delete_limiter() -> CapacityLimiter:
+    global _tree_delete_limiter
+    if _tree_delete_limiter is None:
+        _tree_delete_limiter = CapacityLimiter(TREE_DELETE_THREADS)
+    return _tree_delete_limiter
+
+
+async def run_disk_io(func: Callable[..., T], *args) -> T:
+    """
+    Run a blocking filesystem call in a worker thread from the disk I/O pool.
+    """
+    return await anyio.to_thread.run_sync(func, *args, limiter=_get_limiter())
+
+
+async def run_tree_delete(func: Callable[..., T], *args) -> T:
+    """
+    Run a blocking recursive delete in a worker thread, at most TREE_DELETE_THREADS at a time.
+    """
+    return await anyio.to_thread.run_sync(func, *args, limiter=_get_tree_delete_limiter())
@@ -1,8 +1,26 @@
+import errno
+import hashlib
+import json
+import os
 import shutil
+import time
+from concurrent.futures import Executor
+from functools import partial
 from pathlib import Path
 import asyncio
 import mimetypes
-from typing import Optional, List, BinaryIO
+from typing import Optional, List, AsyncIterator, Any, Union
+
+from app.services.disk_io import run_disk_io
+from app.utils.exceptions import BadRequestError
+
+
+def _hash_file(path: str) -> str:
+    """
+    SHA-256 of a file; module-level so it can run in a worker process.
+    """
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
 
 
 class FileDiskService:
@@ -10,56 +28,299 @@ class FileDiskService:
     Async-capable service for saving, deleting and processing files on disk.
     """
 
+    __slots__ = (
+        "base_path", "_base_str", "allowed_extensions", "_mime_map",
+        "max_size_bytes", "write_buffer_size", "hash_executor", "uploads_dir",
+    )
+
     def __init__(
         self,
         base_path: Path,
-        allowed_extensions: Optional[List[str]] = None
+        system_path: Path,
+        allowed_extensions: Optional[List[str]] = None,
+        max_size_bytes: Optional[int] = None,
+        write_buffer_size: int = 1 << 20,
+        hash_executor: Optional[Executor] = None,
     ):
         """
         :param base_path: root of the storage area
+        :param system_path: service directory outside `base_path` (same filesystem), where
+                            partial uploads live without colliding with user folders
         :param allowed_extensions: if given, only files with these extensions are permitted (e.g. ['.jpg','.png','.mp4'])
+        :param max_size_bytes: if given, uploads larger than this are rejected
+        :param write_buffer_size: number of streamed bytes collected before each disk write
+        :param hash_executor: executor for checksum computation (a process pool keeps it off the event loop's process);
+                              None means the default thread pool
         """
         self.base_path = base_path
+        self._base_str = os.fspath(base_path)
         self.allowed_extensions = [ext.lower() for ext in allowed_extensions] if allowed_extensions else None
+        # extension -> MIME type; prefilled for the allow-list, memoized for the rest
+        self._mime_map: dict[str, str] = {
+            ext: mimetypes.guess_type("x" + ext)[0] or "application/octet-stream"
+            for ext in self.allowed_extensions or []
+        }
+        self.max_size_bytes = max_size_bytes
+        self.write_buffer_size = write_buffer_size
+        self.hash_executor = hash_executor
+        # directory holding partial (resumable) and staged uploads
+        self.uploads_dir = system_path / "uploads"
 
-    def compute_file_path(self, virtual_path: str, filename: str) -> Path:
+    def compute_file_path(self, virtual_path: str, filename: str) -> str:
         """
         Build the physical path for a given virtual directory + filename.
+        Paths are plain strings: they only ever go to os.* calls and the DB.
         """
-        parts = [seg for seg in virtual_path.strip("/").split("/") if seg]
-        return Path(self.base_path, *parts, filename)
+        # empty segments (root "/" or doubled slashes) are no-ops for os.path.join
+        return os.path.join(self._base_str, *virtual_path.split("/"), filename)
 
-    async def save_file(self, stream: BinaryIO, virtual_path: str, filename: str) -> Path:
+    def check_extension(self, path: str) -> None:
         """
-        Save an uploaded file (binary stream) to disk, ensuring directories exist.
-        Returns the Path to the saved file.
-        :raises: ValueError if extension not allowed.
+        :raises: BadRequestError if extension not allowed.
         """
-        path = self.compute_file_path(virtual_path, filename)
-        ext = path.suffix.lower()
+        ext = os.path.splitext(path)[1].lower()
         if self.allowed_extensions is not None and ext not in self.allowed_extensions:
-            raise ValueError(f"Extension '{ext}' not allowed")
-
-        # write in thread
-        def _write():
-            path.parent.mkdir(parents=True, exist_ok=True)
-            with path.open("wb") as f:
-                shutil.copyfileobj(stream, f)
-        await asyncio.to_thread(_write)
+            raise BadRequestError(f"Extension '{ext}' not allowed")
+
+    async def stage_stream(self, chunks: AsyncIterator[bytes], filename: str) -> tuple[str, int, str]:
+        """
+        Write an async stream of chunks into the uploads area, hashing it on the way;
+        move it into place with place_staged() once the destination folder is known.
+        Small chunks are coalesced up to `write_buffer_size` so that each
+        thread hop issues one large write(2) instead of many small ones.
+        Returns the staged path, the number of bytes written and the hex SHA-256.
+        :raises: BadRequestError if extension not allowed or the size limit is exceeded.
+        """
+        self.check_extension(filename)
+        path = os.path.join(self.uploads_dir, f"{filename}.stream")
+        await run_disk_io(partial(os.makedirs, self.uploads_dir, exist_ok=True))
+        written, checksum = await self._write_stream(chunks, path)
+        return path, written, checksum
+
+    async def place_staged(self, staged_path: Union[str, Path], virtual_path: str, filename: str) -> str:
+        """
+        Atomically move a staged file to its final location.
+        :raises: FileNotFoundError if the staged file is gone.
+        """
+        path = self.compute_file_path(virtual_path, filename)
+
+        def _place():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.rename(staged_path, path)
+        await run_disk_io(_place)
         return path
 
-    async def delete_file(self, path: Path) -> None:
+    async def _write_stream(self, chunks: AsyncIterator[bytes], path: str) -> tuple[int, str]:
+        written = 0
+        pending = bytearray()
+        hasher = hashlib.sha256()
+        try:
+            # buffered on purpose: BufferedWriter retries short write(2)s until every byte
+            # is on disk, and blocks larger than its buffer still go out as one write
+            f = await run_disk_io(open, path, "wb")
+            try:
+                async for chunk in chunks:
+                    written += len(chunk)
+                    if self.max_size_bytes is not None and written > self.max_size_bytes:
+                        raise BadRequestError(f"File exceeds maximum size of {self.max_size_bytes} bytes")
+                    pending += chunk
+                    if len(pending) >= self.write_buffer_size:
+                        await self._write_and_hash(f, hasher, pending)
+                        pending = bytearray()
+                if pending:
+                    await self._write_and_hash(f, hasher, pending)
+            finally:
+                await run_disk_io(f.close)
+        except BaseException:
+            await self.delete_file(path)
+            raise
+        return written, hasher.hexdigest()
+
+    @staticmethod
+    async def _write_and_hash(f, hasher: "hashlib._Hash", data: bytearray) -> None:
+        # hashlib releases the GIL on large buffers, so hashing overlaps the write;
+        # both hops use the disk I/O limiter, not the default thread pool
+        await asyncio.gather(run_disk_io(f.write, data), run_disk_io(hasher.update, data))
+
+    def _upload_paths(self, upload_id: str) -> tuple[Path, Path, Path]:
+        base = self.uploads_dir / upload_id
+        return base.with_suffix(".part"), base.with_suffix(".json"), base.with_suffix(".ranges")
+
+    async def init_upload(self, upload_id: str, size_bytes: int, meta: dict[str, Any]) -> None:
+        """
+        Reserve a sparse `.part` file of the final size and store upload metadata next to it.
+        :raises: BadRequestError if the size limit is exceeded.
+        """
+        if self.max_size_bytes is not None and size_bytes > self.max_size_bytes:
+            raise BadRequestError(f"File exceeds maximum size of {self.max_size_bytes} bytes")
+        part, meta_path, ranges = self._upload_paths(upload_id)
+
+        def _init():
+            os.makedirs(self.uploads_dir, exist_ok=True)
+            with open(part, "wb") as f:
+                f.truncate(size_bytes)
+            open(ranges, "w").close()
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+        await run_disk_io(_init)
+
+    async def read_upload_meta(self, upload_id: str) -> dict[str, Any]:
+        """
+        :raises: FileNotFoundError if the upload does not exist.
+        """
+        _, meta_path, _ = self._upload_paths(upload_id)
+
+        def _read():
+            with open(meta_path, "r") as f:
+                return json.load(f)
+        return await run_disk_io(_read)
+
+    async def write_chunk(
+        self,
+        upload_id: str,
+        offset: int,
+        length: int,
+        chunks: AsyncIterator[bytes],
+    ) -> None:
+        """
+        Write `length` bytes at `offset` of a partial upload and record the range.
+        Each call uses its own file descriptor, so non-overlapping chunks
+        may be written concurrently.
+        :raises: FileNotFoundError if the upload does not exist.
+        :raises: BadRequestError if the body does not match the declared length.
+        """
+        part, _, ranges = self._upload_paths(upload_id)
+        written = 0
+        f = await run_disk_io(open, part, "r+b")
+        try:
+            await run_disk_io(f.seek, offset)
+            async for chunk in chunks:
+                written += len(chunk)
+                if written > length:
+                    raise BadRequestError(f"Chunk body exceeds declared length of {length} bytes")
+                await run_disk_io(f.write, chunk)
+        finally:
+            await run_disk_io(f.close)
+        if written != length:
+            raise BadRequestError(f"Chunk body has {written} bytes, expected {length}")
+
+        def _record():
+            # O_APPEND keeps concurrent single-line writes from interleaving
+            with open(ranges, "a") as f:
+                f.write(f"{offset} {offset + length}\n")
+        await run_disk_io(_record)
+
+    async def received_offset(self, upload_id: str) -> int:
+        """
+        Length of the contiguous prefix of a partial upload received so far.
+        :raises: FileNotFoundError if the upload does not exist.
+        """
+        _, _, ranges = self._upload_paths(upload_id)
+        content = await run_disk_io(Path.read_text, ranges)
+        offset = 0
+        for start, end in sorted(tuple(map(int, line.split())) for line in content.splitlines() if line):
+            if start > offset:
+                break
+            offset = max(offset, end)
+        return offset
+
+    async def finalize_upload(self, upload_id: str, virtual_path: str, filename: str) -> str:
+        """
+        Atomically move a completed upload to its final location. Its bookkeeping
+        files are kept until discard_upload(), so unfinalize_upload() can still undo this.
+        :raises: FileNotFoundError if the upload was already finalized.
+        """
+        part, _, _ = self._upload_paths(upload_id)
+        return await self.place_staged(part, virtual_path, filename)
+
+    async def unfinalize_upload(self, upload_id: str, path: str) -> None:
+        """
+        Move a finalized upload back to its `.part` file, so the last chunk can be retried.
+        """
+        part, _, _ = self._upload_paths(upload_id)
+        await run_disk_io(os.rename, path, part)
+
+    async def discard_upload(self, upload_id: str) -> None:
+        """
+        Drop the bookkeeping files of a finalized upload.
+        """
+        for leftover in self._upload_paths(upload_id)[1:]:
+            await self.delete_file(leftover)
+
+    async def purge_stale_uploads(self, max_age: float) -> int:
+        """
+        Delete partial and staged uploads that have not been touched for `max_age` seconds.
+        Files of one upload share a stem (`<id>.part/.json/.ranges`, `<id><ext>.stream`)
+        and are removed together, judged by the most recently written of them.
+        Returns the number of uploads removed.
+        """
+        def _purge() -> int:
+            deadline = time.time() - max_age
+            groups: dict[str, list[os.DirEntry]] = {}
+            try:
+                with os.scandir(self.uploads_dir) as entries:
+                    for entry in entries:
+                        groups.setdefault(entry.name.rsplit(".", 1)[0], []).append(entry)
+            except FileNotFoundError:
+                return 0
+            removed = 0
+            for files in groups.values():
+                if max(f.stat().st_mtime for f in files) >= deadline:
+                    continue
+                for f in files:
+                    try:
+                        os.unlink(f.path)
+                    except FileNotFoundError:
+                        pass
+                removed += 1
+            return removed
+        return await run_disk_io(_purge)
+
+    async def move_file(self, old_path: str, new_path: str) -> None:
+        """
+        Move a stored file, replacing whatever is at `new_path`.
+        Within one filesystem this is a single atomic rename; the bytes are
+        only copied (via sendfile where possible) when crossing devices.
+        :raises: BadRequestError if the new extension is not allowed.
+        """
+        self.check_extension(new_path)
+
+        def _move():
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            try:
+                os.replace(old_path, new_path)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # shutil.copyfile uses sendfile(2) on Linux
+                shutil.copyfile(old_path, new_path)
+                os.unlink(old_path)
+        await run_disk_io(_move)
+
+    async def delete_file(self, path: Union[str, Path]) -> None:
         """
         Delete a file if it exists.
         """
         def _unlink():
-            if path.exists():
-                path.unlink()
-        await asyncio.to_thread(_unlink)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        await run_disk_io(_unlink)
+
+    async def compute_checksum(self, path: str) -> str:
+        """
+        Hex SHA-256 of a stored file, computed in `hash_executor`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.hash_executor, _hash_file, path)
 
-    async def get_mime_type(self, path: Path) -> str:
+    def get_mime_type(self, path: str) -> str:
         """
-        Detect mime type by extension or content.
+        Detect mime type by extension.
         """
-        mime, _ = mimetypes.guess_type(str(path))
-        return mime or "application/octet-stream"
+        ext = os.path.splitext(path)[1].lower()
+        mime = self._mime_map.get(ext)
+        if mime is None:
+            mime = self._mime_map[ext] = mimetypes.guess_type("x" + ext)[0] or "application/octet-stream"
+        return mime
@@ -1,28 +1,38 @@
 # app/services/business/file_service.py
+import asyncio
+import os
 import uuid
-from pathlib import Path
-from typing import Optional, List, BinaryIO
+from typing import Optional, List, AsyncIterator
 from uuid import UUID
 
+from loguru import logger
+from pydantic import ValidationError
 from fastapi_pagination import Page
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import NoResultFound
 
 from app.db.crud import FileRepository, FolderRepository
+from app.schemas.folder import FolderDB
 from app.schemas import PaginationParamsSchema
 from app.services import FileDiskService
-from app.schemas.file import FileIn, FileUpdate, FileDB, FileOut, FileDownloadInfo
+from app.services.disk_io import run_disk_io
+from app.utils.exceptions import BadRequestError
+from app.schemas.file import (
+    FileIn, FileUpdate, FileDB, FileOut, FileDownloadInfo, FileUploadInit, FileUploadStatus,
+)
 
 
 class FileService:
     """
     Business‐logic service that coordinates file operations both
     on the filesystem (via FileDiskService) and in the database
-    (via FileRepository).
+    (via FileRepository). Each mutating method commits exactly once.
 
     Returns FileOut for all operations.
     """
 
+    __slots__ = ("session", "repo", "folder_repo", "disk")
+
     def __init__(
         self,
         session: AsyncSession,
@@ -51,100 +61,275 @@ class FileService:
         Retrieve a file info by its ID.
         """
         db_item: FileDB = await self.repo.get_by_id(file_id)
-        return FileOut.model_validate(db_item.model_dump())
+        return FileOut.model_validate(db_item, from_attributes=True)
+
+    async def _release_connection(self) -> None:
+        """
+        End the current read-only transaction so its pooled connection goes back
+        to the pool; the session reconnects on its next statement.
+        """
+        # nothing was written, so a rollback is enough and it doesn't count as a commit;
+        # repositories return detached schemas, so the ORM expiry it does is harmless
+        await self.session.rollback()
+
+    async def _get_folder_and_release(self, folder_path: str) -> FolderDB:
+        folder = await self.folder_repo.get_by_virtual_path(folder_path)
+        # the upload body may keep streaming for a long time: don't hold a DB connection meanwhile
+        await self._release_connection()
+        return folder
 
     async def get_file_info_for_download(self, file_path: str) -> FileDownloadInfo:
-        db_item: FileDB = await self.repo.get_by_path(file_path)
-        return FileDownloadInfo.model_validate(db_item.model_dump())
+        """
+        Retrieve download info, stat-ing the file once so the response does not have to.
+        """
+        location = await self.repo.get_location_by_path(file_path)
+        # the session lives until the response has been sent; free the connection before streaming
+        await self._release_connection()
+        try:
+            stat_result = await run_disk_io(os.stat, location.storage_path)
+        except FileNotFoundError:
+            raise NoResultFound(f"File with path {file_path} is missing from storage")
+        return FileDownloadInfo(
+            name=location.name,
+            storage_path=location.storage_path,
+            mime_type=location.mime_type,
+            stat_result=stat_result,
+        )
 
-    async def upload(
+    async def upload_stream(
         self,
         file_name: Optional[str],
         uploader_user_id: uuid.UUID,
         folder_path: str,
-        stream: BinaryIO
+        chunks: AsyncIterator[bytes],
     ) -> FileOut:
-        folder_info = await self.folder_repo.get_by_virtual_path(folder_path)
-
         # 1) Сгенерировать UUID для файла
         file_id = uuid.uuid4()
         f_name = str(file_id) if file_name is None else file_name
+        # the name comes straight from the multipart header: reject it before the body is streamed
+        try:
+            file_info = FileIn(name=f_name, uploader_user_id=uploader_user_id)
+        except ValidationError:
+            raise BadRequestError(f"Invalid file name {f_name!r}") from None
 
-        # 2) Определить виртуальный путь с этим UUID и расширением
-        ext = Path(f_name).suffix  # например, ".png"
-        base_virt = folder_info.virtual_path.rstrip("/")
-        virt_file_path = f"{base_virt}/{file_id}{ext}"
+        # 2) Имя файла на диске — UUID.ext (например, ".png")
+        disk_name = f"{file_id}{os.path.splitext(f_name)[1]}"
+        self.disk.check_extension(disk_name)
 
-        # 3) Сохранить на диск в папку base_virt
-        phys_path = await self.disk.save_file(
-            stream,
-            base_virt or "/",      # виртуальная папка, в которой лежит файл
-            f"{file_id}{ext}"      # имя файла на диске — тоже UUID.ext
-        )
+        # 3) Поиск папки в БД идёт параллельно с записью потока во временный файл:
+        #    время загрузки — max(БД, диск), а не сумма
+        folder_task = stage_task = None
+        try:
+            async with asyncio.TaskGroup() as tg:
+                folder_task = tg.create_task(self._get_folder_and_release(folder_path))
+                stage_task = tg.create_task(self.disk.stage_stream(chunks, disk_name))
+        except BaseExceptionGroup as eg:
+            # the stream may have finished before the folder lookup failed
+            if stage_task is not None and stage_task.done() and not stage_task.cancelled() \
+                    and stage_task.exception() is None:
+                await self.disk.delete_file(stage_task.result()[0])
+            first, *rest = eg.exceptions
+            for exc in rest:
+                logger.opt(exception=exc).warning(f"Upload {file_id}: concurrent step also failed")
+            # surface the original error (NoResultFound, BadRequestError, ...) to the handlers
+            raise first from None
+        folder_info = folder_task.result()
+        staged_path, size_bytes, checksum = stage_task.result()
 
-        # 4) Определить размер и MIME
-        size_bytes = phys_path.stat().st_size
-        mime_type = await self.disk.get_mime_type(phys_path)
+        # папки хранятся с завершающим "/", так что файл просто дописывается в конец
+        folder_virt = folder_info.virtual_path
+        virt_file_path = f"{folder_virt}{disk_name}"
+        # until the row is committed the bytes on disk belong to nobody: remove them on any failure
+        current_path = staged_path
+        try:
+            phys_path = current_path = await self.disk.place_staged(staged_path, folder_virt, disk_name)
 
-        file_info = FileIn(
-            name=f_name,
-            uploader_user_id=uploader_user_id,
-            folder_id=folder_info.id,
-        )
-        # 5) Создать запись в БД, передав нужные поля
-        db_item: FileDB = await self.repo.create(
-            file_info,
-            storage_path=str(phys_path),
-            virtual_path=virt_file_path,
+            # 4) Определить MIME
+            mime_type = self.disk.get_mime_type(phys_path)
+
+            file_info.folder_id = folder_info.id
+            # 5) Создать запись в БД, передав нужные поля
+            db_item: FileDB = await self.repo.create(
+                file_info,
+                storage_path=phys_path,
+                virtual_path=virt_file_path,
+                size_bytes=size_bytes,
+                mime_type=mime_type,
+                file_id=file_id,
+                checksum_sha256=checksum,
+            )
+            await self.session.commit()
+        except BaseException:
+            await self.disk.delete_file(current_path)
+            raise
+
+        return FileOut.model_validate(db_item, from_attributes=True)
+
+    async def init_upload(self, data: FileUploadInit) -> FileUploadStatus:
+        """
+        Start a resumable upload: reserve space on disk and remember which folder the file goes to.
+        """
+        folder_info = await self.folder_repo.get_by_virtual_path(data.folder_path)
+
+        upload_id = uuid.uuid4()
+        ext = os.path.splitext(data.name)[1]
+        disk_name = f"{upload_id}{ext}"
+        self.disk.check_extension(disk_name)
+
+        await self.disk.init_upload(str(upload_id), data.size_bytes, {
+            "name": data.name,
+            "uploader_user_id": str(data.uploader_user_id),
+            "folder_id": str(folder_info.id),
+            "disk_name": disk_name,
+            "size_bytes": data.size_bytes,
+        })
+        return FileUploadStatus(upload_id=upload_id, offset=0, size_bytes=data.size_bytes)
+
+    async def _read_upload_meta(self, upload_id: UUID) -> dict:
+        try:
+            return await self.disk.read_upload_meta(str(upload_id))
+        except FileNotFoundError:
+            raise NoResultFound(f"Upload with id {upload_id} not found")
+
+    async def upload_status(self, upload_id: UUID) -> FileUploadStatus:
+        """
+        Report how many contiguous bytes of a resumable upload have been received.
+        """
+        # both are small independent reads: overlap them
+        try:
+            meta, offset = await asyncio.gather(
+                self.disk.read_upload_meta(str(upload_id)),
+                self.disk.received_offset(str(upload_id)),
+            )
+        except FileNotFoundError:
+            raise NoResultFound(f"Upload with id {upload_id} not found")
+        return FileUploadStatus(upload_id=upload_id, offset=offset, size_bytes=meta["size_bytes"])
+
+    async def append_chunk(
+        self,
+        upload_id: UUID,
+        offset: int,
+        length: int,
+        chunks: AsyncIterator[bytes],
+    ) -> FileUploadStatus:
+        """
+        Write one chunk of a resumable upload; once every byte is received,
+        move the file into place and create its DB record.
+        """
+        meta = await self._read_upload_meta(upload_id)
+        size_bytes = meta["size_bytes"]
+        if offset < 0 or length < 0 or offset + length > size_bytes:
+            raise BadRequestError(f"Range {offset}-{offset + length} is outside of the {size_bytes}-byte upload")
+
+        try:
+            await self.disk.write_chunk(str(upload_id), offset, length, chunks)
+        except FileNotFoundError:
+            # the `.part` file has already been moved into place by the final chunk
+            raise NoResultFound(f"Upload with id {upload_id} not found or already completed")
+        received = await self.disk.received_offset(str(upload_id))
+        if received < size_bytes:
+            return FileUploadStatus(upload_id=upload_id, offset=received, size_bytes=size_bytes)
+
+        # the folder may have been renamed or deleted since init_upload: place the file
+        # by its current path, and keep the row locked until the file row is committed
+        folder_info = await self.folder_repo.get_by_id(UUID(meta["folder_id"]), for_share=True)
+        folder_virt = folder_info.virtual_path
+        try:
+            phys_path = await self.disk.finalize_upload(str(upload_id), folder_virt, meta["disk_name"])
+        except FileNotFoundError:
+            # a concurrent chunk request has already finalized this upload
+            return FileUploadStatus(upload_id=upload_id, offset=received, size_bytes=size_bytes)
+
+        try:
+            mime_type = self.disk.get_mime_type(phys_path)
+            checksum = await self.disk.compute_checksum(phys_path)
+            file_info = FileIn(
+                name=meta["name"],
+                uploader_user_id=meta["uploader_user_id"],
+                folder_id=folder_info.id,
+            )
+            db_item: FileDB = await self.repo.create(
+                file_info,
+                storage_path=phys_path,
+                virtual_path=f"{folder_virt}{meta['disk_name']}",
+                size_bytes=size_bytes,
+                mime_type=mime_type,
+                file_id=upload_id,
+                checksum_sha256=checksum,
+            )
+            await self.session.commit()
+        except BaseException:
+            # put the bytes back so the client can retry the last chunk
+            await self.disk.unfinalize_upload(str(upload_id), phys_path)
+            raise
+
+        try:
+            await self.disk.discard_upload(str(upload_id))
+        except OSError as e:
+            # harmless leftovers: purge_stale_uploads removes them later
+            logger.warning(f"Upload {upload_id}: could not drop bookkeeping files: {e}")
+        return FileUploadStatus(
+            upload_id=upload_id,
+            offset=received,
             size_bytes=size_bytes,
-            mime_type=mime_type,
-            file_id=file_id,
+            file=FileOut.model_validate(db_item, from_attributes=True),
         )
 
-        return FileOut.model_validate(db_item.model_dump())
-
     async def update_metadata(
         self,
         file_id: UUID,
         data: FileUpdate
     ) -> FileOut:
         """
-        Update file metadata (name, virtual_path, folder_id).
+        Update file metadata (name, folder_id).
+
+        Files are stored as `<id><ext>` inside their folder, so the file only
+        moves on disk when its folder or its extension changes. The row is updated
+        before the move and the file is moved back if the commit fails.
         """
         db_item = await self.repo.get_by_id(file_id)
 
-        # If renaming or moving on disk is needed:
-        old_path = Path(db_item.storage_path)
-        new_path = self.disk.compute_file_path(
-            data.virtual_path or db_item.virtual_path,
-            data.name or db_item.name
-        )
-        if str(old_path) != str(new_path):
-            await self.disk.delete_file(new_path)  # remove existing if any
-            await self.disk.save_file(old_path.open("rb"),
-                                      data.virtual_path or db_item.virtual_path,
-                                      data.name or db_item.name)
-            await self.disk.delete_file(old_path)
+        folder_id = data.folder_id or db_item.folder_id
+        folder_virt = (await self.folder_repo.get_by_id(folder_id)).virtual_path if folder_id else "/"
+        disk_name = f"{file_id}{os.path.splitext(data.name or db_item.name)[1]}"
 
+        old_path = db_item.storage_path
+        new_path = self.disk.compute_file_path(folder_virt, disk_name)
+        # row first (uncommitted): a failing update must not leave the file moved
         updated_db: FileDB = await self.repo.update(
             file_id,
             data,
-            storage_path=str(new_path)
+            storage_path=new_path,
+            virtual_path=f"{folder_virt}{disk_name}",
         )
-        return FileOut.model_validate(updated_db.model_dump())
+        if old_path == new_path:
+            await self.session.commit()
+            return FileOut.model_validate(updated_db, from_attributes=True)
+
+        # same filesystem: one rename(2), no bytes copied
+        await self.disk.move_file(old_path, new_path)
+        try:
+            await self.session.commit()
+        except BaseException:
+            await self.disk.move_file(new_path, old_path)
+            raise
+        return FileOut.model_validate(updated_db, from_attributes=True)
 
     async def delete_file_by_id(self, file_id: UUID) -> None:
         """
         Remove file both from disk and database.
+
+        The row is deleted first (uncommitted) to learn its storage path in the
+        same round-trip, and committed only once the file is gone from disk.
         """
-        db_item: FileDB = await self.repo.get_by_id(file_id)
-        await self.disk.delete_file(Path(db_item.storage_path))
-        await self.repo.delete(file_id)
+        location = await self.repo.delete(file_id)
+        await self.disk.delete_file(location.storage_path)
+        await self.session.commit()
 
     async def delete_file_by_path(self, path: str) -> None:
         """
         Remove file both from disk and database.
         """
-        db_item: FileDB = await self.repo.get_by_path(path)
-        await self.disk.delete_file(Path(db_item.storage_path))
-        await self.repo.delete(db_item.id)
+        location = await self.repo.delete_by_path(path)
+        await self.disk.delete_file(location.storage_path)
+        await self.session.commit()
@@ -0,0 +1,168 @@
+import hashlib
+import time
+from typing import Optional
+from uuid import UUID
+
+from cachetools import TTLCache
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.schemas.folder import FolderOut
+
+
+# generations seen when a lookup missed: (in-process, Redis); Redis part is None if it couldn't be read
+FillToken = tuple[int, Optional[bytes]]
+
+
+class FolderCache:
+    """
+    Two-level cache for folder lookups: an in-process TTL cache (L1)
+    in front of an optional shared Redis (L2).
+
+    Keys follow `{domain}:{identifier}`:
+      - `folder:by-path:{sha1(virtual_path)}`
+      - `folder:by-id:{id}`
+
+    Every cached folder is also indexed in the `folder:paths` sorted set as
+    `{virtual_path}\\0{id}`, so all descendants of a path can be found with a
+    single ZRANGEBYLEX and dropped when the path is renamed, moved or deleted.
+    Lex ranges need equal scores, so the expiry time of each member is kept in
+    a parallel `folder:paths:expiry` set, and members whose entries have
+    expired are trimmed from both sets on every write.
+
+    A lookup that misses returns a FillToken with the current invalidation
+    generation; every invalidation bumps it (`folder:generation` in Redis), and
+    set() only fills the cache if it hasn't changed. So a row read from the DB
+    just before a concurrent update commits is never written back over the
+    invalidation.
+    """
+
+    INDEX_KEY = "folder:paths"
+    EXPIRY_KEY = "folder:paths:expiry"
+    GENERATION_KEY = "folder:generation"
+    # KEYS: generation, path key, id key, index, expiry
+    # ARGV: expected generation, value, ttl, index member, now, trim batch size
+    _SET_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+local now = tonumber(ARGV[5])
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+redis.call('SET', KEYS[3], ARGV[2], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[4], 0, ARGV[4])
+redis.call('ZADD', KEYS[5], now + tonumber(ARGV[3]), ARGV[4])
+local stale = redis.call('ZRANGEBYSCORE', KEYS[5], '-inf', now, 'LIMIT', 0, ARGV[6])
+if #stale > 0 then
+    redis.call('ZREM', KEYS[4], unpack(stale))
+    redis.call('ZREM', KEYS[5], unpack(stale))
+end
+return 1
+"""
+    TRIM_BATCH = 500
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        ttl: int = 300,
+        local_ttl: int = 5,
+        local_maxsize: int = 4096,
+    ):
+        """
+        :param redis: shared Redis client; if None only the in-process cache is used
+        :param ttl: Redis entry lifetime in seconds
+        :param local_ttl: in-process entry lifetime in seconds; kept short because
+                          other workers' L1 caches are not notified of invalidations
+        :param local_maxsize: max number of in-process entries
+        """
+        self.redis = redis
+        self.ttl = ttl
+        self._local: TTLCache = TTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self._generation = 0
+
+    @staticmethod
+    def _path_key(virtual_path: str) -> str:
+        return f"folder:by-path:{hashlib.sha1(virtual_path.encode()).hexdigest()}"
+
+    @staticmethod
+    def _id_key(folder_id: UUID) -> str:
+        return f"folder:by-id:{folder_id}"
+
+    async def _get(self, key: str) -> tuple[Optional[FolderOut], FillToken]:
+        generation = self._generation
+        folder = self._local.get(key)
+        if folder is not None or self.redis is None:
+            return folder, (generation, None)
+        try:
+            # the generation comes in the same round-trip as the entry
+            raw, redis_generation = await self.redis.mget(key, self.GENERATION_KEY)
+        except RedisError as e:
+            logger.warning(f"Folder cache read failed: {e}")
+            return None, (generation, None)
+        if raw is None:
+            return None, (generation, redis_generation or b"0")
+        folder = FolderOut.model_validate_json(raw)
+        self._local[key] = folder
+        return folder, (generation, None)
+
+    async def get_by_path(self, virtual_path: str) -> tuple[Optional[FolderOut], FillToken]:
+        return await self._get(self._path_key(virtual_path))
+
+    async def get_by_id(self, folder_id: UUID) -> tuple[Optional[FolderOut], FillToken]:
+        return await self._get(self._id_key(folder_id))
+
+    async def set(self, folder: FolderOut, token: FillToken) -> None:
+        """
+        Cache a folder under both its path and its id, unless it was invalidated
+        since the lookup that returned `token`.
+        """
+        generation, redis_generation = token
+        if generation != self._generation:
+            return
+        path_key = self._path_key(folder.virtual_path)
+        id_key = self._id_key(folder.id)
+        self._local[path_key] = folder
+        self._local[id_key] = folder
+        if self.redis is None or redis_generation is None:
+            return
+        try:
+            await self.redis.eval(
+                self._SET_SCRIPT, 5,
+                self.GENERATION_KEY, path_key, id_key, self.INDEX_KEY, self.EXPIRY_KEY,
+                redis_generation, folder.model_dump_json(), self.ttl,
+                f"{folder.virtual_path}\0{folder.id}", time.time(), self.TRIM_BATCH,
+            )
+        except RedisError as e:
+            logger.warning(f"Folder cache write failed: {e}")
+
+    async def invalidate_prefix(self, virtual_path: str) -> None:
+        """
+        Drop the folder at `virtual_path` and every cached descendant.
+        """
+        self._generation += 1
+        for key, folder in list(self._local.items()):
+            if folder.virtual_path.startswith(virtual_path):
+                self._local.pop(key, None)
+        if self.redis is None:
+            return
+        try:
+            prefix = virtual_path.encode()
+            # bump the generation first: fills that started before this point are refused
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.incr(self.GENERATION_KEY)
+                pipe.zrangebylex(self.INDEX_KEY, b"[" + prefix, b"[" + prefix + b"\xff")
+                _, members = await pipe.execute()
+            if not members:
+                return
+            keys = []
+            for member in members:
+                path, folder_id = (member.decode() if isinstance(member, bytes) else member).split("\0")
+                keys.append(self._path_key(path))
+                keys.append(f"folder:by-id:{folder_id}")
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*keys)
+                pipe.zrem(self.INDEX_KEY, *members)
+                pipe.zrem(self.EXPIRY_KEY, *members)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Folder cache invalidation failed: {e}")
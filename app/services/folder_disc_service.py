@@ -1,54 +1,146 @@
+import asyncio
+import errno
+import os
 import shutil
+import time
+import uuid
 from pathlib import Path
-import asyncio
+from typing import Optional
+
+from loguru import logger
+
+from app.services.disk_io import run_disk_io, run_tree_delete
 
 
 class FolderDiskService:
     """
     Асинхронный сервис для работы с папками на файловой системе.
-    Все методы не блокируют event loop, а выполняются в пуле потоков.
+    Все методы не блокируют event loop, а выполняются в отдельном пуле потоков для дисковых операций.
+    Пути — обычные строки: они уходят только в os.* и в БД, Path тут лишний.
     """
 
-    def __init__(self, base_path: Path):
+    __slots__ = ("base_path", "_base_str", "trash_dir", "_purges")
+
+    def __init__(self, base_path: Path, system_path: Path):
+        """
+        :param base_path: корень пользовательского дерева папок
+        :param system_path: служебный каталог вне base_path (на том же разделе);
+                            внутри base_path он пересекался бы с папками пользователей
+        """
         self.base_path = base_path
+        self._base_str = os.fspath(base_path)
+        # удаляемые деревья переносятся сюда (тот же раздел — rename атомарный)
+        self.trash_dir = os.path.join(system_path, "trash")
+        # ссылки на фоновые удаления, чтобы задачи не собрал GC
+        self._purges: set[asyncio.Task] = set()
 
-    def compute_storage_path(self, virtual_path: str) -> Path:
+    def compute_storage_path(self, virtual_path: str) -> str:
         """
-        Правильно конструирует Path из base_path и виртуального пути.
+        Правильно конструирует путь на диске из base_path и виртуального пути.
         """
-        # 1) Разбиваем виртуальный путь на сегменты
-        parts = [segment for segment in virtual_path.strip("/").split("/") if segment]
-        # 2) Склеиваем base_path и все сегменты
-        return Path(self.base_path, *parts)
+        # сегменты виртуального пути — валидированные имена без '/', так что достаточно срезать крайние
+        rel = virtual_path.strip("/")
+        return os.path.join(self._base_str, rel) if rel else self._base_str
 
-    async def exists(self, path: Path) -> bool:
+    async def exists(self, path: str) -> bool:
         """
         Проверяет, существует ли папка. Выполняется в отдельном потоке.
         """
-        return await asyncio.to_thread(path.is_dir)
+        return await run_disk_io(os.path.isdir, path)
 
-    async def create_folder(self, path: Path) -> None:
+    async def create_folder(self, path: str) -> None:
         """
         Создаёт папку и все родительские директории. Если уже есть — FileExistsError.
         """
-        def _mkdir():
-            path.mkdir(parents=True, exist_ok=False)
-        await asyncio.to_thread(_mkdir)
+        await run_disk_io(os.makedirs, path)
+
+    async def detach_folder(self, path: str) -> Optional[str]:
+        """
+        Убирает дерево папки из пользовательского пространства, ничего не удаляя:
+        один rename в trash (O(1)). Вернуть на место — restore_folder(),
+        удалить окончательно — purge_folder() после commit.
+
+        :returns: куда переехала папка; сам `path`, если trash на другом разделе
+                  (тогда папка остаётся на месте); None, если папки нет
+        """
+        def _detach() -> Optional[str]:
+            os.makedirs(self.trash_dir, exist_ok=True)
+            target = os.path.join(self.trash_dir, uuid.uuid4().hex)
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                return None
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                return path
+            return target
+        return await run_disk_io(_detach)
 
-    async def delete_folder(self, path: Path) -> None:
+    async def restore_folder(self, detached: str, path: str) -> None:
         """
-        Рекурсивно удаляет папку. Если нет — пропускает.
+        Возвращает отсоединённое detach_folder() дерево на прежнее место.
         """
+        if detached != path:
+            await run_disk_io(os.rename, detached, path)
+
+    async def purge_folder(self, detached: str) -> None:
+        """
+        Окончательно удаляет дерево, отсоединённое detach_folder().
+
+        Из trash удаление идёт в фоне — запрос не ждёт обхода тысяч файлов;
+        папка, оставшаяся на месте (другой раздел), удаляется сразу, чтобы
+        новая папка с тем же путём не попала под фоновое удаление.
+        """
+        if os.path.dirname(detached) != self.trash_dir:
+            await self._rmtree(detached)
+            return
+        task = asyncio.create_task(self._purge(detached))
+        self._purges.add(task)
+        task.add_done_callback(self._purges.discard)
+
+    async def purge_trash(self, min_age: float = 3600) -> None:
+        """
+        Запускает фоновое удаление того, что осталось в trash (например, после рестарта).
+
+        :param min_age: секунды с момента переноса в trash; более свежие деревья могут
+                        ещё ждать commit (и возможного restore) в другом воркере
+        """
+        def _list() -> list[str]:
+            deadline = time.time() - min_age
+            try:
+                with os.scandir(self.trash_dir) as entries:
+                    # rename обновляет ctime, так что это время переноса в trash
+                    return [e.path for e in entries if e.stat(follow_symlinks=False).st_ctime < deadline]
+            except FileNotFoundError:
+                return []
+        for path in await run_disk_io(_list):
+            task = asyncio.create_task(self._purge(path))
+            self._purges.add(task)
+            task.add_done_callback(self._purges.discard)
+
+    @staticmethod
+    async def _rmtree(path: str) -> None:
         def _rmtree():
-            if path.exists():
+            try:
                 shutil.rmtree(path)
-        await asyncio.to_thread(_rmtree)
+            except FileNotFoundError:
+                pass
+        # отдельный небольшой лимит потоков: долгий обход дерева не съедает общий пул
+        await run_tree_delete(_rmtree)
+
+    async def _purge(self, path: str) -> None:
+        try:
+            await self._rmtree(path)
+        except Exception as e:
+            # останется в trash; purge_trash подберёт при следующем старте
+            logger.warning(f"Background folder delete failed for {path}: {e}")
 
-    async def rename_folder(self, old_path: Path, new_path: Path) -> None:
+    async def rename_folder(self, old_path: str, new_path: str) -> None:
         """
         Переименовывает (перемещает) папку, создавая при необходимости родителя.
         """
         def _rename():
-            new_path.parent.mkdir(parents=True, exist_ok=True)
-            old_path.rename(new_path)
-        await asyncio.to_thread(_rename)
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            os.rename(old_path, new_path)
+        await run_disk_io(_rename)
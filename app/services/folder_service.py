@@ -1,7 +1,6 @@
 # app/services/business/folder_service.py
 
-from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, AsyncIterator
 from uuid import UUID
 
 from fastapi_pagination import Page
@@ -10,6 +9,7 @@ from sqlalchemy.exc import NoResultFound
 
 from app.db.crud.folder import FolderRepository
 from app.schemas import PaginationParamsSchema
+from app.services.folder_cache import FolderCache
 from app.services.folder_disc_service import FolderDiskService
 from app.schemas.folder import FolderIn, FolderUpdate, FolderDB, FolderOut
 from app.utils.exceptions import FolderAlreadyExistsError
@@ -19,22 +19,26 @@ class FolderService:
     """
     Business‐logic service that coordinates folder operations both
     on the filesystem (via FolderDiskService) and in the database
-    (via FolderRepository).
+    (via FolderRepository). Each mutating method commits exactly once.
 
     Returns FolderOut for all operations.
     """
 
+    __slots__ = ("session", "repo", "disk", "base_virtual", "cache")
+
     def __init__(
         self,
         session: AsyncSession,
         repo: FolderRepository,
         disk: FolderDiskService,
-        base_virtual: str = "/"
+        base_virtual: str = "/",
+        cache: Optional[FolderCache] = None,
     ):
         self.session = session
         self.repo = repo
         self.disk = disk
         self.base_virtual = base_virtual.rstrip("/") + "/"
+        self.cache = cache
 
     async def list_folders_by_parent_id(
         self,
@@ -50,89 +54,145 @@ class FolderService:
         """
         return await self.repo.list_by_parent_paginated(parent_id, params)
 
+    async def stream_folders_by_parent_id(
+        self,
+        parent_id: Optional[UUID] = None
+    ) -> AsyncIterator[FolderOut]:
+        """
+        Stream every child folder under a given parent without building the full list.
+
+        :param parent_id: UUID of the parent folder, or None for root folders
+        """
+        # bound once: the loop runs per row of a potentially huge listing
+        validate = FolderOut.model_validate
+        async for folder in self.repo.stream_by_parent(parent_id):
+            yield validate(folder, from_attributes=True)
+
     async def get_by_id(self, folder_id: UUID) -> FolderOut:
         """
         Retrieve a folder by its ID, or raise NoResultFound.
         """
+        if self.cache is None:
+            return FolderOut.model_validate(await self.repo.get_by_id(folder_id), from_attributes=True)
+        cached, token = await self.cache.get_by_id(folder_id)
+        if cached is not None:
+            return cached
         db_item: FolderDB = await self.repo.get_by_id(folder_id)
-        return FolderOut.model_validate(db_item.model_dump())
+        folder = FolderOut.model_validate(db_item, from_attributes=True)
+        await self.cache.set(folder, token)
+        return folder
 
     async def get_by_virtual_path(self, path: str) -> FolderOut:
         """
-        Retrieve a folder by its ID, or raise NoResultFound.
+        Retrieve a folder by its virtual path, or raise NoResultFound.
         """
+        if self.cache is None:
+            return FolderOut.model_validate(await self.repo.get_by_virtual_path(path), from_attributes=True)
+        cached, token = await self.cache.get_by_path(path)
+        if cached is not None:
+            return cached
         db_item: FolderDB = await self.repo.get_by_virtual_path(path)
-        return FolderOut.model_validate(db_item.model_dump())
+        folder = FolderOut.model_validate(db_item, from_attributes=True)
+        await self.cache.set(folder, token)
+        return folder
 
     async def create(self, data: FolderIn) -> FolderOut:
         """
         Create folder on disk and in DB, return FolderOut.
         """
-        # virtual_path
-
+        # virtual_path: folder paths always end with "/", so the name is simply appended
         if data.parent_id:
             parent = await self.repo.get_by_id(data.parent_id)
-            virt = parent.virtual_path.rstrip("/") + f"/{data.name}/"
+            virt = f"{parent.virtual_path}{data.name}/"
         else:
-            virt = self.base_virtual + f"{data.name}/"
-
-        try:
-            await self.repo.get_by_virtual_path(virt)
-        except NoResultFound:
-            pass
-        else:
-            raise FolderAlreadyExistsError(virt)
+            virt = f"{self.base_virtual}{data.name}/"
 
         # physical path
         phys_path = self.disk.compute_storage_path(virt)
-        await self.disk.create_folder(phys_path)
 
-        # persist
-        db_item: FolderDB = await self.repo.create(
+        # insert first: an existing path is detected by the same statement,
+        # and the row is only committed once the directory exists
+        db_item: Optional[FolderDB] = await self.repo.create(
             data,
-            storage_path=str(phys_path),
+            storage_path=phys_path,
             virtual_path=virt
         )
-        return FolderOut.model_validate(db_item.model_dump())
+        if db_item is None:
+            raise FolderAlreadyExistsError(virt)
+
+        await self.disk.create_folder(phys_path)
+        await self.session.commit()
+        return FolderOut.model_validate(db_item, from_attributes=True)
 
     async def update(self, folder_id: UUID, data: FolderUpdate) -> FolderOut:
         """
         Update folder metadata and disk, return FolderOut.
         """
         existing: FolderDB = await self.repo.get_by_id(folder_id)
+        # empty PATCH: nothing to write, nothing to rename
+        if not data.model_fields_set:
+            return FolderOut.model_validate(existing, from_attributes=True)
 
         new_name = data.name or existing.name
         # determine new virtual path
-        if data.parent_id is not None:
+        if data.name is None and data.parent_id is None:
+            new_virt = existing.virtual_path
+        elif data.parent_id is not None:
             if data.parent_id:
                 new_parent = await self.repo.get_by_id(data.parent_id)
-                base_virt = new_parent.virtual_path.rstrip("/")
+                virt_parent = new_parent.virtual_path
             else:
-                base_virt = self.base_virtual.rstrip("/")
-            new_virt = f"{base_virt}/{new_name}/"
+                virt_parent = self.base_virtual
+            new_virt = f"{virt_parent}{new_name}/"
         else:
-            virt_parent = existing.virtual_path.rstrip("/").rsplit("/", 1)[0]
-            new_virt = f"{virt_parent}/{new_name}/"
+            # "/a/b/" -> "/a/": cut after the second-to-last slash
+            virt_parent = existing.virtual_path[:existing.virtual_path.rindex("/", 0, -1) + 1]
+            new_virt = f"{virt_parent}{new_name}/"
 
-        # rename on disk if changed
-        old_path = Path(existing.storage_path)
-        new_path = self.disk.compute_storage_path(new_virt)
-        if str(old_path) != str(new_path):
-            await self.disk.rename_folder(old_path, new_path)
+        old_path = existing.storage_path
+        new_path = old_path if new_virt == existing.virtual_path else self.disk.compute_storage_path(new_virt)
 
-        # update in DB
+        # update in DB first so constraint errors surface before touching the disk
         updated_db: FolderDB = await self.repo.update(
             folder_id,
             data,
-            storage_path=str(new_path),
+            storage_path=new_path,
             virtual_path=new_virt
         )
-        return FolderOut.model_validate(updated_db.model_dump())
+
+        # rename on disk if changed; undone if the commit fails, so the row and the tree agree
+        if new_path != old_path:
+            await self.disk.rename_folder(old_path, new_path)
+        try:
+            await self.session.commit()
+        except BaseException:
+            if new_path != old_path:
+                await self.disk.rename_folder(new_path, old_path)
+            raise
+        # the folder and all its descendants may have a new virtual path now
+        if self.cache is not None:
+            await self.cache.invalidate_prefix(existing.virtual_path)
+        return FolderOut.model_validate(updated_db, from_attributes=True)
 
     async def delete(self, folder_id: UUID) -> None:
         """
         Remove folder both from disk and database.
+
+        The row is deleted first (uncommitted) to learn its paths in the same
+        round-trip. The directory tree is then detached (renamed out of the user
+        tree) and only purged once the commit has succeeded; if the commit fails
+        it is renamed back, so the restored row still has its files.
         """
-        existing: FolderDB = await self.repo.get_by_id(folder_id)
-        await self.disk.delete_folder(Path(existing.storage_path))
-        await self.repo.delete(folder_id)
+        existing: FolderDB = await self.repo.delete(folder_id)
+        detached = await self.disk.detach_folder(existing.storage_path)
+        try:
+            await self.session.commit()
+        except BaseException:
+            if detached is not None:
+                await self.disk.restore_folder(detached, existing.storage_path)
+            raise
+        if detached is not None:
+            await self.disk.purge_folder(detached)
+        # descendants are removed by ON DELETE CASCADE
+        if self.cache is not None:
+            await self.cache.invalidate_prefix(existing.virtual_path)
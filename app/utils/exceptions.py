@@ -6,4 +6,14 @@ class AppError(Exception):
 class FolderAlreadyExistsError(AppError):
     """Raised when attempting to create a folder whose virtual_path already exists."""
     def __init__(self, virtual_path: str):
-        super().__init__(f"Folder at '{virtual_path}' already exists")
+        # the message is only formatted if someone actually reads it
+        super().__init__(virtual_path)
+        self.virtual_path = virtual_path
+
+    def __str__(self) -> str:
+        return f"Folder at '{self.virtual_path}' already exists"
+
+
+class BadRequestError(AppError):
+    """Raised when client input is rejected (bad extension, size limit, malformed range...)."""
+    pass
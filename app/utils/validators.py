@@ -1,24 +1,22 @@
 from typing_extensions import Annotated
 
-from pydantic import Field
-from pydantic.functional_validators import AfterValidator
+from pydantic import Field, StringConstraints
 
 
-def validate_no_slash(name: str) -> str:
-    """
-    Ensure that the provided folder name does not contain '/'.
-    """
-    if "/" in name:
-        raise ValueError("Folder name cannot contain '/'")
-    return name
+# one path segment other than "." or ".."; written without look-arounds so
+# pydantic-core compiles it with its linear-time Rust regex engine
+_SEGMENT = r"(?:[^/\x00.][^/\x00]*|\.[^/\x00.][^/\x00]*|\.\.[^/\x00]+)"
 
+# '/', '/library/', '/library/24/'
+VIRTUAL_FOLDER_PATH_PATTERN = rf"^/(?:{_SEGMENT}/)*$"
+# '/library/24/<uuid>.pdf'
+VIRTUAL_FILE_PATH_PATTERN = rf"^/(?:{_SEGMENT}/)*{_SEGMENT}$"
+
+
+# a single path segment, checked inside pydantic-core (no Python callback per value);
+# also rejects "." and ".." so a name can never step out of its parent directory
 NoSlashString = Annotated[
     str,
-    Field(
-            min_length=1,
-            max_length=100,
-            description="Название папки (1–100 символов, без '/')"
-        ),
-    AfterValidator(validate_no_slash)
+    StringConstraints(min_length=1, max_length=100, pattern=rf"^{_SEGMENT}$"),
+    Field(description="Название папки (1–100 символов, без '/')"),
 ]
-
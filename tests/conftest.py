@@ -0,0 +1,50 @@
+# tests/conftest.py
+
+from pathlib import Path
+
+import pytest
+
+from app.services.file_disc_service import FileDiskService
+from app.services.folder_disc_service import FolderDiskService
+
+
+class FakeSession:
+    """
+    Stand-in for AsyncSession: counts commits/rollbacks, can be told to fail the next commit.
+    """
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+        self.fail_commit = False
+
+    async def commit(self) -> None:
+        if self.fail_commit:
+            self.fail_commit = False
+            raise ConnectionError("commit failed")
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def session() -> FakeSession:
+    return FakeSession()
+
+
+@pytest.fixture
+def storage(tmp_path: Path) -> Path:
+    base = tmp_path / "storage"
+    base.mkdir()
+    return base
+
+
+@pytest.fixture
+def file_disk(storage: Path) -> FileDiskService:
+    return FileDiskService(base_path=storage, system_path=storage.with_name("storage.system"))
+
+
+@pytest.fixture
+def folder_disk(storage: Path) -> FolderDiskService:
+    return FolderDiskService(base_path=storage, system_path=storage.with_name("storage.system"))
@@ -0,0 +1,70 @@
+# tests/test_errors.py
+
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError, NoResultFound
+
+from app.api.errors import register_exception_handlers
+from app.services.file_disc_service import FileDiskService
+from app.services.file_service import FileService
+from app.utils.exceptions import BadRequestError, FolderAlreadyExistsError
+
+ORIGIN = "http://client.example"
+
+
+def _raise(exc: BaseException):
+    async def endpoint():
+        raise exc
+    return endpoint
+
+
+async def _empty_body():
+    return
+    yield
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory) -> TestClient:
+    app = FastAPI()
+    register_exception_handlers(app)
+    # same order as app.main: handlers first, CORS outermost
+    app.add_middleware(CORSMiddleware, allow_origins=[ORIGIN])
+    errors = {
+        "/not-found": NoResultFound("File with id 1 not found"),
+        "/integrity": IntegrityError("INSERT INTO files ...", {}, Exception("duplicate key")),
+        "/folder-exists": FolderAlreadyExistsError("/docs/"),
+        "/file-exists": FileExistsError(17, "File exists", "/srv/storage/docs/a.txt"),
+        "/bad-request": BadRequestError("Extension '.exe' not allowed"),
+        "/crash": RuntimeError("password=hunter2"),
+    }
+    for path, exc in errors.items():
+        app.get(path)(_raise(exc))
+
+    base = tmp_path_factory.mktemp("storage")
+    service = FileService(None, None, None, FileDiskService(base, base.with_name("system")))
+
+    @app.get("/upload")
+    async def upload(name: str):
+        return await service.upload_stream(name, uuid.uuid4(), "/", _empty_body())
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.mark.parametrize(("path", "status", "detail"), [
+    ("/not-found", 404, "File with id 1 not found"),
+    ("/integrity", 409, "Database constraint violated"),
+    ("/folder-exists", 409, "Folder at '/docs/' already exists"),
+    ("/file-exists", 409, "Target already exists"),
+    ("/bad-request", 400, "Extension '.exe' not allowed"),
+    ("/upload?name=..", 400, "Invalid file name '..'"),
+    ("/crash", 500, "Internal server error"),
+])
+def test_error_mapping(client, path, status, detail):
+    response = client.get(path, headers={"Origin": ORIGIN})
+    assert response.status_code == status
+    assert response.json() == {"detail": detail}
+    assert response.headers["access-control-allow-origin"] == ORIGIN
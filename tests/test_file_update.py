@@ -0,0 +1,90 @@
+# tests/test_file_update.py
+
+import os
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.schemas.file import FileDB, FileUpdate
+from app.services.file_service import FileService
+
+
+class FakeFolderRepo:
+    def __init__(self, folders: dict):
+        self.folders = folders
+
+    async def get_by_id(self, folder_id):
+        return SimpleNamespace(id=folder_id, virtual_path=self.folders[folder_id])
+
+
+class FakeFileRepo:
+    def __init__(self, item: FileDB):
+        self.item = item
+
+    async def get_by_id(self, file_id):
+        return self.item
+
+    async def update(self, file_id, data: FileUpdate, *, storage_path, virtual_path):
+        self.item = self.item.model_copy(update={
+            **data.model_dump(exclude_unset=True),
+            "storage_path": storage_path,
+            "virtual_path": virtual_path,
+        })
+        return self.item
+
+
+@pytest.fixture
+def folders():
+    return {uuid.uuid4(): "/a/", uuid.uuid4(): "/b/"}
+
+
+@pytest.fixture
+def stored(file_disk, folders):
+    src_id = next(iter(folders))
+    file_id = uuid.uuid4()
+    path = file_disk.compute_file_path("/a/", f"{file_id}.txt")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(b"data")
+    now = datetime.now(timezone.utc)
+    return FileDB(
+        id=file_id, name="note.txt", storage_path=path, virtual_path=f"/a/{file_id}.txt",
+        uploader_user_id=uuid.uuid4(), folder_id=src_id, size_bytes=4, mime_type="text/plain",
+        created_at=now, updated_at=now,
+    )
+
+
+@pytest.fixture
+def service(session, file_disk, folders, stored):
+    return FileService(session, FakeFileRepo(stored), FakeFolderRepo(folders), file_disk)
+
+
+def _target(folders):
+    return list(folders)[1]
+
+
+async def test_rename_keeping_extension_does_not_touch_disk(service, session, stored):
+    out = await service.update_metadata(stored.id, FileUpdate(name="renamed.txt"))
+    assert out.name == "renamed.txt"
+    assert out.virtual_path == stored.virtual_path
+    assert open(stored.storage_path, "rb").read() == b"data"
+    assert session.commits == 1
+
+
+async def test_move_to_another_folder(service, session, stored, folders, file_disk):
+    out = await service.update_metadata(stored.id, FileUpdate(folder_id=_target(folders)))
+    new_path = file_disk.compute_file_path("/b/", f"{stored.id}.txt")
+    assert out.virtual_path == f"/b/{stored.id}.txt"
+    assert open(new_path, "rb").read() == b"data"
+    assert not os.path.exists(stored.storage_path)
+    assert session.commits == 1
+
+
+async def test_failed_commit_moves_the_file_back(service, session, stored, folders, file_disk):
+    session.fail_commit = True
+    with pytest.raises(ConnectionError):
+        await service.update_metadata(stored.id, FileUpdate(folder_id=_target(folders)))
+    assert open(stored.storage_path, "rb").read() == b"data"
+    assert not os.path.exists(file_disk.compute_file_path("/b/", f"{stored.id}.txt"))
@@ -0,0 +1,196 @@
+# tests/test_file_upload.py
+
+import asyncio
+import os
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import NoResultFound
+
+from app.schemas.file import FileDB, FileUploadInit
+from app.services.file_service import FileService
+from app.utils.exceptions import BadRequestError
+
+FOLDER_ID = uuid.uuid4()
+
+
+class FakeFolderRepo:
+    def __init__(self):
+        self.folders = {FOLDER_ID: "/docs/"}
+
+    async def get_by_virtual_path(self, path: str):
+        return SimpleNamespace(id=FOLDER_ID, virtual_path=path)
+
+    async def get_by_id(self, folder_id, for_share: bool = False):
+        if folder_id not in self.folders:
+            raise NoResultFound(f"Folder with id {folder_id} not found")
+        return SimpleNamespace(id=folder_id, virtual_path=self.folders[folder_id])
+
+
+class FakeFileRepo:
+    def __init__(self):
+        self.created: list[FileDB] = []
+
+    async def create(self, file_info, *, storage_path, virtual_path, size_bytes, mime_type,
+                     file_id, checksum_sha256):
+        now = datetime.now(timezone.utc)
+        item = FileDB(
+            id=file_id, name=file_info.name, storage_path=storage_path, virtual_path=virtual_path,
+            uploader_user_id=file_info.uploader_user_id, folder_id=file_info.folder_id,
+            size_bytes=size_bytes, mime_type=mime_type, checksum_sha256=checksum_sha256,
+            created_at=now, updated_at=now,
+        )
+        self.created.append(item)
+        return item
+
+
+async def _body(*parts: bytes):
+    for part in parts:
+        await asyncio.sleep(0)
+        yield part
+
+
+@pytest.fixture
+def repo() -> FakeFileRepo:
+    return FakeFileRepo()
+
+
+@pytest.fixture
+def folder_repo() -> FakeFolderRepo:
+    return FakeFolderRepo()
+
+
+@pytest.fixture
+def service(session, repo, folder_repo, file_disk) -> FileService:
+    return FileService(session, repo, folder_repo, file_disk)
+
+
+async def _init(service: FileService, size: int):
+    return await service.init_upload(FileUploadInit(
+        name="report.txt", uploader_user_id=uuid.uuid4(), folder_path="/docs/", size_bytes=size,
+    ))
+
+
+async def test_chunks_in_any_order_complete_the_upload(service, repo, session, file_disk, storage):
+    status = await _init(service, 10)
+
+    partial = await service.append_chunk(status.upload_id, 5, 5, _body(b"fghij"))
+    assert partial.offset == 0 and partial.file is None
+    done = await service.append_chunk(status.upload_id, 0, 5, _body(b"ab", b"cde"))
+
+    assert done.offset == 10 and done.file is not None
+    stored = storage / "docs" / f"{status.upload_id}.txt"
+    assert stored.read_bytes() == b"abcdefghij"
+    assert len(repo.created) == 1 and session.commits == 1
+    # bookkeeping is gone once the row is committed
+    assert os.listdir(file_disk.uploads_dir) == []
+
+
+async def test_uploads_live_outside_the_user_tree(file_disk, storage):
+    assert not str(file_disk.uploads_dir).startswith(str(storage) + os.sep)
+
+
+async def test_out_of_range_chunk_is_rejected(service):
+    status = await _init(service, 4)
+    with pytest.raises(BadRequestError):
+        await service.append_chunk(status.upload_id, 2, 4, _body(b"abcd"))
+
+
+async def test_short_body_is_rejected(service):
+    status = await _init(service, 4)
+    with pytest.raises(BadRequestError):
+        await service.append_chunk(status.upload_id, 0, 4, _body(b"ab"))
+
+
+async def test_concurrent_final_chunks_create_one_file(service, repo):
+    status = await _init(service, 4)
+    await service.append_chunk(status.upload_id, 0, 2, _body(b"ab"))
+
+    results = await asyncio.gather(
+        service.append_chunk(status.upload_id, 2, 2, _body(b"cd")),
+        service.append_chunk(status.upload_id, 2, 2, _body(b"cd")),
+        return_exceptions=True,
+    )
+
+    assert len(repo.created) == 1
+    assert sum(not isinstance(r, BaseException) and r.file is not None for r in results) == 1
+    # the loser either saw the upload already placed or already gone
+    for r in results:
+        assert not isinstance(r, BaseException) or isinstance(r, NoResultFound)
+
+
+async def test_chunk_after_completion_is_not_found(service):
+    status = await _init(service, 2)
+    await service.append_chunk(status.upload_id, 0, 2, _body(b"ab"))
+    with pytest.raises(NoResultFound):
+        await service.append_chunk(status.upload_id, 0, 2, _body(b"ab"))
+
+
+async def test_failed_commit_restores_the_part_file(service, repo, session, storage):
+    status = await _init(service, 3)
+    session.fail_commit = True
+
+    with pytest.raises(ConnectionError):
+        await service.append_chunk(status.upload_id, 0, 3, _body(b"abc"))
+    assert not (storage / "docs" / f"{status.upload_id}.txt").exists()
+    assert (await service.upload_status(status.upload_id)).offset == 3
+
+    # the client retries the last chunk and the upload completes
+    done = await service.append_chunk(status.upload_id, 0, 3, _body(b"abc"))
+    assert done.file is not None
+    assert (storage / "docs" / f"{status.upload_id}.txt").read_bytes() == b"abc"
+
+
+async def test_folder_renamed_before_the_last_chunk(service, repo, folder_repo, storage):
+    status = await _init(service, 2)
+    folder_repo.folders[FOLDER_ID] = "/archive/"
+
+    done = await service.append_chunk(status.upload_id, 0, 2, _body(b"ab"))
+    assert done.file.virtual_path == f"/archive/{status.upload_id}.txt"
+    assert (storage / "archive" / f"{status.upload_id}.txt").read_bytes() == b"ab"
+    assert not (storage / "docs").exists()
+
+
+async def test_folder_deleted_before_the_last_chunk(service, repo, folder_repo, storage):
+    status = await _init(service, 2)
+    del folder_repo.folders[FOLDER_ID]
+
+    with pytest.raises(NoResultFound):
+        await service.append_chunk(status.upload_id, 0, 2, _body(b"ab"))
+    assert repo.created == [] and os.listdir(storage) == []
+
+
+async def test_stale_uploads_are_purged(service, file_disk):
+    stale = await _init(service, 4)
+    fresh = await _init(service, 4)
+    old = os.path.getmtime(file_disk.uploads_dir) - 3600
+    for path in file_disk.uploads_dir.glob(f"{stale.upload_id}.*"):
+        os.utime(path, (old, old))
+
+    assert await file_disk.purge_stale_uploads(max_age=60) == 1
+    with pytest.raises(NoResultFound):
+        await service.upload_status(stale.upload_id)
+    assert (await service.upload_status(fresh.upload_id)).offset == 0
+
+
+async def test_stream_upload(service, repo, storage):
+    out = await service.upload_stream("notes.txt", uuid.uuid4(), "/docs/", _body(b"hello"))
+    assert out.name == "notes.txt" and out.folder_id == FOLDER_ID
+    assert (storage / "docs" / f"{out.id}.txt").read_bytes() == b"hello"
+
+
+@pytest.mark.parametrize("name", ["..", "a" * 101, "a\x00b.txt"])
+async def test_bad_stream_filename_is_rejected_before_the_body(service, repo, file_disk, name):
+    consumed = False
+
+    async def body():
+        nonlocal consumed
+        consumed = True
+        yield b"data"
+
+    with pytest.raises(BadRequestError):
+        await service.upload_stream(name, uuid.uuid4(), "/docs/", body())
+    assert not consumed and repo.created == []
+    assert not file_disk.uploads_dir.exists()
@@ -0,0 +1,80 @@
+# tests/test_folder_cache.py
+
+import uuid
+from datetime import datetime, timezone
+
+import fakeredis
+import pytest
+
+from app.schemas.folder import FolderOut
+from app.services.folder_cache import FolderCache
+
+
+def _folder(virtual_path: str, folder_id: uuid.UUID = None, name: str = "x") -> FolderOut:
+    now = datetime.now(timezone.utc)
+    return FolderOut(
+        id=folder_id or uuid.uuid4(), name=name, parent_id=None, creator_user_id=uuid.uuid4(),
+        is_published=False, virtual_path=virtual_path, created_at=now, updated_at=now,
+    )
+
+
+@pytest.fixture(params=["local", "redis"])
+def cache(request) -> FolderCache:
+    redis = fakeredis.FakeAsyncRedis() if request.param == "redis" else None
+    return FolderCache(redis=redis, ttl=60)
+
+
+@pytest.fixture
+def other_worker(cache) -> FolderCache:
+    # separate L1, same Redis
+    return FolderCache(redis=cache.redis, ttl=60)
+
+
+async def test_fill_and_hit(cache):
+    folder = _folder("/a/")
+    missed, token = await cache.get_by_id(folder.id)
+    assert missed is None
+    await cache.set(folder, token)
+    assert (await cache.get_by_id(folder.id))[0] == folder
+    assert (await cache.get_by_path("/a/"))[0] == folder
+
+
+async def test_invalidate_drops_descendants(cache, other_worker):
+    parent, child, sibling = _folder("/a/"), _folder("/a/b/"), _folder("/ab/")
+    for folder in (parent, child, sibling):
+        await cache.set(folder, (await cache.get_by_id(folder.id))[1])
+
+    await cache.invalidate_prefix("/a/")
+    reader = other_worker if cache.redis is not None else cache
+    assert (await reader.get_by_id(parent.id))[0] is None
+    assert (await reader.get_by_id(child.id))[0] is None
+    assert (await reader.get_by_path("/ab/"))[0] == sibling
+
+
+async def test_fill_that_raced_an_invalidation_is_refused(cache, other_worker):
+    folder_id = uuid.uuid4()
+    # a reader misses and reads the old row from the DB ...
+    _, token = await cache.get_by_id(folder_id)
+    old = _folder("/old/", folder_id)
+    # ... meanwhile an update commits and invalidates, in this worker or another one
+    invalidator = other_worker if cache.redis is not None else cache
+    await invalidator.invalidate_prefix("/old/")
+    # ... and the stale row must not be written back
+    await cache.set(old, token)
+
+    reader = other_worker if cache.redis is not None else cache
+    assert (await reader.get_by_id(folder_id))[0] is None
+
+
+async def test_expired_index_members_are_trimmed(monkeypatch):
+    redis = fakeredis.FakeAsyncRedis()
+    cache = FolderCache(redis=redis, ttl=60)
+    # written "long ago": its index member has outlived its entries
+    with monkeypatch.context() as m:
+        m.setattr("app.services.folder_cache.time.time", lambda: 1000.0)
+        await cache.set(_folder("/a/"), (await cache.get_by_path("/a/"))[1])
+    fresh = _folder("/b/")
+    await cache.set(fresh, (await cache.get_by_path("/b/"))[1])
+
+    assert await redis.zrange(FolderCache.INDEX_KEY, 0, -1) == [f"/b/\0{fresh.id}".encode()]
+    assert await redis.zcard(FolderCache.EXPIRY_KEY) == 1
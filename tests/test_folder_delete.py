@@ -0,0 +1,67 @@
+# tests/test_folder_delete.py
+
+import asyncio
+import os
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.folder_service import FolderService
+
+
+class FakeFolderRepo:
+    def __init__(self, folder):
+        self.folder = folder
+
+    async def delete(self, folder_id):
+        return self.folder
+
+
+@pytest.fixture
+def tree(folder_disk):
+    path = folder_disk.compute_storage_path("/photos/")
+    os.makedirs(os.path.join(path, "2024"))
+    with open(os.path.join(path, "2024", "a.jpg"), "wb") as f:
+        f.write(b"x")
+    return SimpleNamespace(id=uuid.uuid4(), virtual_path="/photos/", storage_path=path)
+
+
+async def _drain(folder_disk):
+    while folder_disk._purges:
+        await asyncio.gather(*folder_disk._purges)
+
+
+async def test_trash_is_outside_the_user_tree(folder_disk, storage):
+    assert not folder_disk.trash_dir.startswith(str(storage) + os.sep)
+
+
+async def test_delete_purges_after_commit(session, folder_disk, tree):
+    service = FolderService(session, FakeFolderRepo(tree), folder_disk)
+    await service.delete(tree.id)
+    assert not os.path.exists(tree.storage_path)
+    assert session.commits == 1
+    await _drain(folder_disk)
+    assert os.listdir(folder_disk.trash_dir) == []
+
+
+async def test_failed_commit_restores_the_tree(session, folder_disk, tree):
+    service = FolderService(session, FakeFolderRepo(tree), folder_disk)
+    session.fail_commit = True
+    with pytest.raises(ConnectionError):
+        await service.delete(tree.id)
+    assert os.path.exists(os.path.join(tree.storage_path, "2024", "a.jpg"))
+    assert os.listdir(folder_disk.trash_dir) == []
+
+
+async def test_purge_trash_skips_recent_trees(folder_disk, tree):
+    detached = await folder_disk.detach_folder(tree.storage_path)
+
+    # may still be waiting for another worker's commit
+    await folder_disk.purge_trash(min_age=3600)
+    await _drain(folder_disk)
+    assert os.path.exists(detached)
+
+    await folder_disk.purge_trash(min_age=-1)
+    await _drain(folder_disk)
+    assert not os.path.exists(detached)
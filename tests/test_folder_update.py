@@ -0,0 +1,53 @@
+# tests/test_folder_update.py
+
+import os
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.schemas.folder import FolderDB, FolderUpdate
+from app.services.folder_service import FolderService
+
+
+class FakeFolderRepo:
+    def __init__(self, folder: FolderDB):
+        self.folder = folder
+
+    async def get_by_id(self, folder_id):
+        return self.folder
+
+    async def update(self, folder_id, data: FolderUpdate, *, storage_path, virtual_path):
+        return self.folder.model_copy(update={
+            **data.model_dump(exclude_unset=True),
+            "storage_path": storage_path,
+            "virtual_path": virtual_path,
+        })
+
+
+@pytest.fixture
+def folder(folder_disk):
+    path = folder_disk.compute_storage_path("/old/")
+    os.makedirs(path)
+    now = datetime.now(timezone.utc)
+    return FolderDB(
+        id=uuid.uuid4(), name="old", parent_id=None, creator_user_id=uuid.uuid4(),
+        is_published=False, virtual_path="/old/", storage_path=path, access_url=None, created_at=now, updated_at=now,
+    )
+
+
+async def test_rename_moves_the_directory(session, folder_disk, folder):
+    service = FolderService(session, FakeFolderRepo(folder), folder_disk)
+    out = await service.update(folder.id, FolderUpdate(name="new"))
+    assert out.virtual_path == "/new/"
+    assert os.path.isdir(folder_disk.compute_storage_path("/new/"))
+    assert not os.path.exists(folder.storage_path)
+
+
+async def test_failed_commit_renames_the_directory_back(session, folder_disk, folder):
+    service = FolderService(session, FakeFolderRepo(folder), folder_disk)
+    session.fail_commit = True
+    with pytest.raises(ConnectionError):
+        await service.update(folder.id, FolderUpdate(name="new"))
+    assert os.path.isdir(folder.storage_path)
+    assert not os.path.exists(folder_disk.compute_storage_path("/new/"))
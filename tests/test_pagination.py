@@ -0,0 +1,55 @@
+# tests/test_pagination.py
+
+from types import SimpleNamespace
+
+from fastapi_pagination import Params
+from pydantic import BaseModel
+from sqlalchemy import column, select, table
+
+from app.db.pagination import paginate_window
+
+items = table("items", column("name"))
+
+
+class Item(BaseModel):
+    name: str
+
+
+class FakeSession:
+    """
+    Returns `(entity, total)` rows like `COUNT(*) OVER ()` would; `scalar` serves the fallback count.
+    """
+
+    def __init__(self, names: list[str]):
+        self.names = names
+        self.count_queries = 0
+
+    async def execute(self, query):
+        offset = query._offset
+        page = self.names[offset:offset + query._limit]
+        return [(SimpleNamespace(name=name), len(self.names)) for name in page]
+
+    async def scalar(self, query):
+        self.count_queries += 1
+        return len(self.names)
+
+
+async def test_total_comes_from_the_window_count():
+    session = FakeSession([f"n{i}" for i in range(7)])
+    page = await paginate_window(session, select(items), Params(page=2, size=3), Item)
+    assert [i.name for i in page.items] == ["n3", "n4", "n5"]
+    assert page.total == 7 and page.pages == 3
+    assert session.count_queries == 0
+
+
+async def test_page_past_the_end_falls_back_to_count():
+    session = FakeSession([f"n{i}" for i in range(4)])
+    page = await paginate_window(session, select(items), Params(page=5, size=3), Item)
+    assert page.items == [] and page.total == 4
+    assert session.count_queries == 1
+
+
+async def test_empty_result():
+    session = FakeSession([])
+    page = await paginate_window(session, select(items), Params(page=1, size=3), Item)
+    assert page.items == [] and page.total == 0